@@ -0,0 +1,149 @@
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict
+
+from fastapi import HTTPException, status
+
+# ---------------- ADMISSION CONTROL ---------------- #
+
+# Every handler shares one event loop, so a burst of heavy requests slows
+# down everything else. Three guards:
+#   LoopLagMonitor     samples how late the loop wakes up from a short sleep
+#   LoadShedder        (applied by AdmissionMiddleware) rejects heavy paths
+#                      (search, bulk, admin, ...) with 503 + Retry-After while
+#                      the loop lags past a threshold or too many heavy
+#                      requests are in flight; every other path (/api/me, /,
+#                      /metrics) goes through
+#   RateLimiter        per-user token buckets, charged in get_current_user
+#                      once the principal is known; empty bucket -> 429
+
+
+class LoopLagMonitor:
+    def __init__(self, interval=0.05, decay=0.8):
+        self.interval = interval
+        # a spike is held and decays over a few samples, so one quiet
+        # interval in the middle of an overload doesn't reopen the gate
+        self.decay = decay
+        self.lag = 0.0  # seconds
+        self.lag_max = 0.0
+        self._task = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            sample = max(0.0, time.perf_counter() - expected)
+            self.lag = max(sample, self.lag * self.decay)
+            if sample > self.lag_max:
+                self.lag_max = sample
+
+    def stats(self):
+        return {"lag_ms": self.lag * 1000, "lag_max_ms": self.lag_max * 1000}
+
+
+class RateLimiter:
+    def __init__(self, rate, burst, maxsize=100000):
+        self.rate = rate    # tokens per second; 0 disables limiting
+        self.burst = burst  # bucket size
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()  # key -> (tokens, updated_at), least recently used first
+        self.limited = 0
+
+    def acquire(self, key, cost=1.0):
+        """Take `cost` tokens; 0.0 if allowed, else seconds until they are available."""
+        if self.rate <= 0:
+            return 0.0
+        now = time.monotonic()
+        tokens, updated = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        wait = 0.0
+        if tokens >= cost:
+            tokens -= cost
+        else:
+            wait = (cost - tokens) / self.rate
+            self.limited += 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.maxsize:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def check(self, key, cost=1.0):
+        """acquire() that raises 429 with Retry-After when the bucket is empty."""
+        wait = self.acquire(key, cost)
+        if wait:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests",
+                headers={"Retry-After": str(math.ceil(wait))},
+            )
+
+    def stats(self):
+        return {"users": len(self._buckets), "limited": self.limited}
+
+
+class LoadShedder:
+    def __init__(self, monitor, heavy_prefixes, lag_threshold=0.1, max_in_flight=64, retry_after=1):
+        self.monitor = monitor
+        self.heavy_prefixes = tuple(heavy_prefixes)
+        self.lag_threshold = lag_threshold
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.in_flight = 0
+        self.shed = 0
+
+    def is_heavy(self, path):
+        return path.startswith(self.heavy_prefixes)
+
+    def admit(self):
+        if self.monitor.lag > self.lag_threshold or self.in_flight >= self.max_in_flight:
+            self.shed += 1
+            return False
+        self.in_flight += 1
+        return True
+
+    def done(self):
+        self.in_flight -= 1
+
+    def stats(self):
+        return {"in_flight": self.in_flight, "shed": self.shed}
+
+
+class AdmissionMiddleware:
+    def __init__(self, app, shedder):
+        self.app = app
+        self.shedder = shedder
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.shedder.is_heavy(scope["path"]):
+            return await self.app(scope, receive, send)
+
+        if not self.shedder.admit():
+            return await self._reject(send)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.shedder.done()
+
+    async def _reject(self, send):
+        body = json.dumps({"detail": "Server busy, retry shortly"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": status.HTTP_503_SERVICE_UNAVAILABLE,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(self.shedder.retry_after).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
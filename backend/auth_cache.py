@@ -0,0 +1,79 @@
+import time
+from collections import OrderedDict
+
+# ---------------- PRINCIPAL CACHE ---------------- #
+
+# LRU + TTL cache of decoded principals keyed by bearer token.
+# A hit skips both jwt.decode and the users.find_one round trip.
+# Entries never outlive the token's own "exp" claim.
+
+
+class PrincipalCache:
+    def __init__(self, maxsize=10000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # token -> (principal, expires_at)
+        self._by_user = {}             # user id -> {token}
+
+    def get(self, token):
+        entry = self._entries.get(token)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        principal, expires_at = entry
+        if expires_at <= time.monotonic():
+            self._drop(token)
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(token)
+        self.hits += 1
+        return principal
+
+    def put(self, token, principal, token_exp=None):
+        ttl = self.ttl
+        if token_exp is not None:
+            ttl = min(ttl, token_exp - time.time())
+        if ttl <= 0:
+            return
+
+        if token in self._entries:
+            self._drop(token)
+        self._entries[token] = (principal, time.monotonic() + ttl)
+        self._by_user.setdefault(principal["id"], set()).add(token)
+
+        while len(self._entries) > self.maxsize:
+            oldest = next(iter(self._entries))
+            self._drop(oldest)
+
+    def invalidate_token(self, token):
+        if token in self._entries:
+            self._drop(token)
+
+    def invalidate_user(self, user_id):
+        """Call after any write to a user document (name/email/password/delete)."""
+        for token in self._by_user.pop(user_id, set()):
+            self._entries.pop(token, None)
+
+    def clear(self):
+        self._entries.clear()
+        self._by_user.clear()
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+    def _drop(self, token):
+        principal, _ = self._entries.pop(token)
+        tokens = self._by_user.get(principal["id"])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._by_user[principal["id"]]
@@ -0,0 +1,76 @@
+"""
+Latency of one-transfer connection search (SearchEngine.connections).
+
+    cd backend && python -m benchmarks.bench_connections              # synthetic data
+    cd backend && python -m benchmarks.bench_connections --mongo      # full dataset from MONGO_URL/DB_NAME
+    ... --queries 2000 --budget-ms 50                                 # exit 1 if p99 > budget
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+
+from search_engine import SearchEngine, build_search_engine
+
+from benchmarks.synthetic import make_routes
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+async def load_engine(use_mongo):
+    if use_mongo:
+        from motor.motor_asyncio import AsyncIOMotorClient
+
+        client = AsyncIOMotorClient(os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+        return await build_search_engine(client[os.getenv("DB_NAME", "ticketmate_database")])
+
+    engine = SearchEngine()
+    for route in make_routes():
+        engine.add_route(route)
+    return engine
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mongo", action="store_true")
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    engine = asyncio.run(load_engine(args.mongo))
+    build_s = time.perf_counter() - started
+
+    rng = random.Random(1)
+    stations = list(engine.postings)
+    samples = []
+    found = 0
+    for _ in range(args.queries):
+        origin, destination = rng.sample(stations, 2)
+        t0 = time.perf_counter()
+        found += bool(engine.connections(origin, destination))
+        samples.append((time.perf_counter() - t0) * 1000)
+
+    report = {
+        "trains": len(engine),
+        "stations": len(stations),
+        "build_s": round(build_s, 2),
+        "queries": args.queries,
+        "with_connections": found,
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+    }
+    print(json.dumps(report))
+
+    if args.budget_ms is not None and report["p99_ms"] > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Contention on one seat inventory document: many concurrent reserve() calls
+for the same trip/date/class. Checks that exactly min(bookings, capacity)
+succeed and the seat count never goes negative, then reports throughput.
+
+    cd backend && python -m benchmarks.bench_inventory                # local mongod, DB ticketmate_bench
+    cd backend && python -m benchmarks.bench_inventory --mock         # mongomock-motor, no server needed
+    ... --bookings 5000 --capacity 72 --seats 2
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+from inventory import inventory_key, release, reserve
+
+
+def open_db(use_mock):
+    if use_mock:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--mock needs mongomock-motor (pip install mongomock-motor)")
+        return AsyncMongoMockClient()["ticketmate_bench"]
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    return client[os.getenv("BENCH_DB_NAME", "ticketmate_bench")]
+
+
+async def run(args):
+    db = open_db(args.mock)
+    await db.seat_inventory.drop()
+    key = inventory_key("BENCH", "2026-01-01", "SL")
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*[reserve(db, key, args.seats, args.capacity) for _ in range(args.bookings)])
+    elapsed = time.perf_counter() - started
+
+    confirmed = sum(results)
+    doc = await db.seat_inventory.find_one({"_id": key})
+    expected = min(args.bookings, args.capacity // args.seats)
+    report = {
+        "bookings": args.bookings,
+        "capacity": args.capacity,
+        "seats_per_booking": args.seats,
+        "confirmed": confirmed,
+        "waiting": args.bookings - confirmed,
+        "seats_left": doc["seats"],
+        "reserves_per_sec": round(args.bookings / elapsed, 1),
+    }
+    ok = confirmed == expected and doc["seats"] == args.capacity - confirmed * args.seats and doc["seats"] >= 0
+
+    # cancellations hand every seat back
+    await asyncio.gather(*[release(db, key, args.seats) for _ in range(confirmed)])
+    doc = await db.seat_inventory.find_one({"_id": key})
+    ok = ok and doc["seats"] == args.capacity
+
+    await db.seat_inventory.drop()
+    return report, ok
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--bookings", type=int, default=2000)
+    parser.add_argument("--capacity", type=int, default=72)
+    parser.add_argument("--seats", type=int, default=1, help="seats per booking")
+    parser.add_argument("--mock", action="store_true", help="use mongomock-motor instead of MONGO_URL")
+    args = parser.parse_args()
+
+    report, ok = asyncio.run(run(args))
+    print(json.dumps(report, indent=2))
+    if not ok:
+        print("inventory oversold or lost seats", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
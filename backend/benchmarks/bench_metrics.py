@@ -0,0 +1,72 @@
+"""
+Overhead of MetricsMiddleware on a trivial route, which is the worst
+case — real handlers (Mongo round trips, serialization) dilute it further.
+
+    cd backend && python -m benchmarks.bench_metrics [--requests 20000] [--max-overhead 5]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import httpx
+from fastapi import FastAPI
+
+from metrics import MetricsMiddleware, Registry
+
+
+def make_app(instrumented):
+    app = FastAPI()
+
+    @app.get("/api/ping/{item}")
+    async def ping(item: str):
+        return {"item": item}
+
+    if instrumented:
+        app.add_middleware(MetricsMiddleware, registry=Registry())
+    return app
+
+
+async def drive(app, requests, concurrency=32):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def worker(n):
+            for i in range(n):
+                await client.get(f"/api/ping/{i}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker(requests // concurrency) for _ in range(concurrency)])
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--max-overhead", type=float, default=None, help="percent; exit 1 above it")
+    args = parser.parse_args()
+
+    plain, instrumented = make_app(False), make_app(True)
+    asyncio.run(drive(plain, 1000))  # warm-up
+    asyncio.run(drive(instrumented, 1000))
+
+    # best of N alternating rounds, to damp scheduler noise
+    base = with_metrics = float("inf")
+    for _ in range(args.rounds):
+        base = min(base, asyncio.run(drive(plain, args.requests)))
+        with_metrics = min(with_metrics, asyncio.run(drive(instrumented, args.requests)))
+    overhead = (with_metrics - base) / base * 100
+
+    print(json.dumps({
+        "requests": args.requests,
+        "plain_rps": round(args.requests / base),
+        "instrumented_rps": round(args.requests / with_metrics),
+        "overhead_pct": round(overhead, 2),
+    }))
+    if args.max_overhead is not None and overhead > args.max_overhead:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
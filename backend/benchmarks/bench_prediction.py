@@ -0,0 +1,61 @@
+"""
+Scoring cost of the prediction model: one vectorised score() call over a
+batch vs one score_one() call per booking (what a per-booking /predict
+loop costs on the server side).
+
+    cd backend && python -m benchmarks.bench_prediction
+    ... --trips 2000 --outcomes 200000 --batch 500
+"""
+import argparse
+import json
+import random
+import time
+
+from prediction import CLASSES, PredictionModel
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trips", type=int, default=2000)
+    parser.add_argument("--outcomes", type=int, default=200000)
+    parser.add_argument("--batch", type=int, default=500)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    rng = random.Random(7)
+    trips = [str(10000 + i) for i in range(args.trips)]
+    model = PredictionModel()
+    started = time.perf_counter()
+    model.add_outcomes([{
+        "trip_id": rng.choice(trips),
+        "class_type": rng.choice(CLASSES),
+        "joined_position": rng.randint(1, 80),
+        "outcome": rng.choice(("confirmed", "cancelled")),
+    } for _ in range(args.outcomes)])
+    build = time.perf_counter() - started
+
+    batch = [(rng.choice(trips), rng.choice(CLASSES), rng.randint(1, 80)) for _ in range(args.batch)]
+    t_ids, classes, positions = zip(*batch)
+
+    vectorised, looped = [], []
+    for _ in range(args.rounds):
+        t0 = time.perf_counter()
+        model.score(t_ids, classes, positions)
+        vectorised.append(time.perf_counter() - t0)
+        t0 = time.perf_counter()
+        for t, c, p in batch:
+            model.score_one(t, c, p)
+        looped.append(time.perf_counter() - t0)
+
+    print(json.dumps({
+        "outcomes": args.outcomes,
+        "build_ms": round(build * 1000, 1),
+        "batch": args.batch,
+        "batch_ms": round(min(vectorised) * 1000, 3),
+        "per_item_ms": round(min(looped) * 1000, 3),
+        "speedup": round(min(looped) / min(vectorised), 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
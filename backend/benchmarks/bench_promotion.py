@@ -0,0 +1,155 @@
+"""
+Waiting-list promotion under mass cancellation.
+
+Seeds one trip with a sold-out coach and a long waiting list, then cancels
+bookings the way cancel_booking does (flip status, release seats, hand the
+event to PromotionWorker) and times how long the worker takes to settle.
+
+    partial    --cancel confirmed bookings are cancelled; as many waiting
+               bookings are promoted and the rest move up
+    train      every booking on the trip is cancelled (a cancelled train)
+
+Checks that the derived positions of everyone still waiting are 1..n in
+ticket order, with no gaps.
+
+    cd backend && python -m benchmarks.bench_promotion --mock
+    cd backend && python -m benchmarks.bench_promotion --capacity 500 --waiting 2000 --cancel 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from bson import ObjectId
+
+from counters import fill_waiting_positions
+from inventory import inventory_key, release
+from promotion import PromotionWorker
+
+TRIP = "BENCH"
+DATE = "2026-01-01"
+CLASS = "SL"
+
+
+def open_db(use_mock):
+    if use_mock:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("--mock needs mongomock-motor (pip install mongomock-motor)")
+        return AsyncMongoMockClient()["ticketmate_bench"]
+
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    client = AsyncIOMotorClient(os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    return client[os.getenv("BENCH_DB_NAME", "ticketmate_bench")]
+
+
+async def seed(db, capacity, waiting):
+    key = inventory_key(TRIP, DATE, CLASS)
+    for name in ("bookings", "seat_inventory", "waitlist_sequences", "counters"):
+        await db[name].drop()
+    await db.seat_inventory.insert_one({"_id": key, "capacity": capacity, "seats": 0})
+    await db.waitlist_sequences.insert_one({"_id": TRIP, "seq": waiting})
+
+    def booking(status, position):
+        doc = {
+            "_id": ObjectId(),
+            "user_id": "bench",
+            "trip_id": TRIP,
+            "date": DATE,
+            "class_type": CLASS,
+            "passengers": [{"name": "P", "age": 30, "gender": "F"}],
+            "status": status,
+            "pnr": f"PNR{position or 0:06d}",
+            "waiting_ticket": position,
+            "joined_position": position,
+        }
+        if status == "confirmed":
+            doc.update(inventory_key=key, seats_held=1)
+        return doc
+
+    docs = [booking("confirmed", None) for _ in range(capacity)]
+    docs += [booking("waiting", p) for p in range(1, waiting + 1)]
+    await db.bookings.insert_many(docs)
+    return docs
+
+
+async def cancel(db, worker, doc):
+    # what cancel_booking does once find_one_and_update returned the old doc
+    now = datetime.utcnow().isoformat()
+    await db.bookings.update_one({"_id": doc["_id"]}, {"$set": {"status": "cancelled", "updated_at": now}})
+    if doc["status"] == "waiting":
+        await db.bookings.update_one({"_id": doc["_id"]}, {"$set": {"resolved_at": now, "outcome": "cancelled"}})
+    else:
+        await release(db, doc["inventory_key"], doc["seats_held"])
+        await worker.seats_released(TRIP, doc["inventory_key"])
+
+
+async def run_scenario(db, args, scenario):
+    docs = await seed(db, args.capacity, args.waiting)
+    if scenario == "partial":
+        victims = [d for d in docs if d["status"] == "confirmed"][:args.cancel]
+    else:
+        victims = docs
+
+    notified = 0
+
+    async def notify(user_id, type_, message):
+        nonlocal notified
+        notified += 1
+
+    worker = PromotionWorker(db, notify, batch_size=args.batch)
+    worker.start()
+    started = time.perf_counter()
+    await asyncio.gather(*[cancel(db, worker, d) for d in victims])
+    await worker.drain()
+    elapsed = time.perf_counter() - started
+    await worker.stop()
+
+    still = await db.bookings.find(
+        {"trip_id": TRIP, "status": "waiting"}, {"trip_id": 1, "status": 1, "waiting_ticket": 1}
+    ).sort("waiting_ticket", 1).to_list(None)
+    positions = [d["waiting_position"] for d in await fill_waiting_positions(db, still)]
+    expected_promoted = 0 if scenario == "train" else min(len(victims), args.waiting)
+    ok = (
+        positions == list(range(1, len(positions) + 1))
+        and worker.promoted == expected_promoted
+        and notified == worker.promoted
+    )
+    return {
+        "cancelled": len(victims),
+        "promoted": worker.promoted,
+        "still_waiting": len(positions),
+        "batches": worker.batches,
+        "settle_ms": round(elapsed * 1000, 1),
+        "cancellations_per_sec": round(len(victims) / elapsed, 1),
+        "ok": ok,
+    }
+
+
+async def main(args):
+    db = open_db(args.mock)
+    report = {s: await run_scenario(db, args, s) for s in ("partial", "train")}
+    for name in ("bookings", "seat_inventory", "waitlist_sequences", "counters"):
+        await db[name].drop()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--capacity", type=int, default=300)
+    parser.add_argument("--waiting", type=int, default=1000)
+    parser.add_argument("--cancel", type=int, default=200, help="confirmed bookings cancelled in the partial scenario")
+    parser.add_argument("--batch", type=int, default=500, help="worker batch size")
+    parser.add_argument("--mock", action="store_true", help="use mongomock-motor instead of MONGO_URL")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    print(json.dumps(report, indent=2))
+    if not all(r["ok"] for r in report.values()):
+        print("waiting list left inconsistent", file=sys.stderr)
+        sys.exit(1)
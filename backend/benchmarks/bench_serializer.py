@@ -0,0 +1,81 @@
+"""
+Serializer microbenchmark: old serialize_mongo + FastAPI JSONResponse path
+vs serializer.docs_response on a 200-document booking list.
+
+    cd backend && python -m benchmarks.bench_serializer
+"""
+import copy
+import json
+import timeit
+from datetime import datetime
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from serializer import docs_response
+
+N_DOCS = 200
+REPEAT = 200
+
+
+def serialize_mongo(doc):
+    # previous server.py helper, kept here as the baseline
+    if not doc:
+        return None
+    out = dict(doc)
+    _id = out.pop("_id", None)
+    if _id is not None:
+        out["id"] = str(_id)
+    for k, v in list(out.items()):
+        if isinstance(v, ObjectId):
+            out[k] = str(v)
+    return out
+
+
+def make_docs():
+    now = datetime.utcnow().isoformat()
+    return [{
+        "_id": ObjectId(),
+        "user_id": str(ObjectId()),
+        "trip_id": "12951",
+        "trip_type": "train",
+        "passengers": [{"name": f"P{i}", "age": 30, "gender": "F"}, {"name": "Q", "age": 41, "gender": "M"}],
+        "booking_type": "waiting",
+        "status": "waiting",
+        "pnr": f"PNR{i:06d}",
+        "route": "Demo City → Demo Destination",
+        "date": "2026-01-01",
+        "waiting_position": i,
+        "prediction_percentage": 42.0,
+        "created_at": now,
+    } for i in range(N_DOCS)]
+
+
+def old_path(docs):
+    return JSONResponse(jsonable_encoder([serialize_mongo(d) for d in docs])).body
+
+
+def new_path(docs):
+    return docs_response(docs).body
+
+
+def main():
+    base = make_docs()
+    assert json.loads(old_path(copy.deepcopy(base))) == json.loads(new_path(copy.deepcopy(base)))
+
+    # fresh copies per run since docs_response renames _id in place
+    batches = [copy.deepcopy(base) for _ in range(REPEAT * 2)]
+    old = timeit.timeit(lambda: old_path(batches.pop()), number=REPEAT)
+    new = timeit.timeit(lambda: new_path(batches.pop()), number=REPEAT)
+
+    print(json.dumps({
+        "docs": N_DOCS,
+        "old_ms": round(old / REPEAT * 1000, 3),
+        "new_ms": round(new / REPEAT * 1000, 3),
+        "speedup": round(old / new, 2),
+    }))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Timetable snapshot: worker startup and query cost, mmap vs in-process index.
+
+Builds a SearchEngine from synthetic routes (what a worker does from
+train_routes), writes the snapshot, then times open_snapshot() and a mix
+of search() / connections() on both engines, checking they agree.
+
+    cd backend && python -m benchmarks.bench_snapshot
+    ... --trains 10000 --stations 3000 --queries 500
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+from search_engine import SearchEngine
+from timetable import open_snapshot, write_snapshot
+
+from benchmarks.synthetic import make_routes
+
+
+def timed_queries(engine, pairs):
+    started = time.perf_counter()
+    results = [(engine.search(o, d), engine.connections(o, d)) for o, d in pairs]
+    return results, (time.perf_counter() - started) * 1000 / len(pairs)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--trains", type=int, default=3000)
+    parser.add_argument("--stations", type=int, default=800)
+    parser.add_argument("--queries", type=int, default=300)
+    args = parser.parse_args()
+
+    routes = make_routes(n_trains=args.trains, n_stations=args.stations)
+    started = time.perf_counter()
+    engine = SearchEngine()
+    for route in routes:
+        engine.add_route(route)
+    build_ms = (time.perf_counter() - started) * 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "timetable.snap")
+        started = time.perf_counter()
+        size = write_snapshot(engine, path, data_version=1, load_id="bench")
+        write_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        mapped = open_snapshot(path, data_version=1, load_id="bench")
+        open_ms = (time.perf_counter() - started) * 1000
+        stale = open_snapshot(path, data_version=2, load_id="bench")
+
+        rng = random.Random(3)
+        stations = sorted(engine.postings)
+        pairs = [tuple(rng.sample(stations, 2)) for _ in range(args.queries)]
+        expected, heap_ms = timed_queries(engine, pairs)
+        actual, mmap_ms = timed_queries(mapped, pairs)
+
+        sample = routes[0]["trainNumber"]
+        ok = (
+            stale is None
+            and len(mapped) == len(engine)
+            and actual == expected
+            and mapped.by_number.get(sample) == engine.by_number.get(sample)
+        )
+
+    print(json.dumps({
+        "trains": len(engine),
+        "stations": len(stations),
+        "snapshot_bytes": size,
+        "build_from_routes_ms": round(build_ms, 1),
+        "write_ms": round(write_ms, 1),
+        "open_snapshot_ms": round(open_ms, 2),
+        "query_ms_heap": round(heap_ms, 3),
+        "query_ms_mmap": round(mmap_ms, 3),
+        "identical": ok,
+    }, indent=2))
+    if not ok:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
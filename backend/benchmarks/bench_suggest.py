@@ -0,0 +1,76 @@
+"""
+Station typeahead latency (StationIndex.suggest), one call per keystroke.
+
+    cd backend && python -m benchmarks.bench_suggest
+    ... --stations 9000 --budget-ms 1          # exit 1 if p99 > budget
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from search_engine import SearchEngine
+from station_index import StationIndex
+
+from benchmarks.synthetic import make_routes, station_codes
+
+WORDS = ("new", "old", "junction", "central", "road", "nagar", "cantt", "city", "halt", "pur", "abad", "gaon")
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stations", type=int, default=9000)
+    parser.add_argument("--trains", type=int, default=3000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--budget-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    rng = random.Random(5)
+    codes = station_codes(args.stations)
+    names = {
+        c: " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 3))).upper() + f" {i}"
+        for i, c in enumerate(codes)
+    }
+    engine = SearchEngine()
+    for route in make_routes(n_trains=args.trains, n_stations=args.stations):
+        engine.add_route(route)
+
+    started = time.perf_counter()
+    index = StationIndex(names.items(), engine.route_counts())
+    build_ms = (time.perf_counter() - started) * 1000
+
+    # every prefix of a typed word or code, as a user would send them
+    typed = []
+    while len(typed) < args.queries:
+        text = rng.choice(codes) if rng.random() < 0.3 else names[rng.choice(codes)]
+        typed += [text[:n] for n in range(1, len(text) + 1)]
+    typed = typed[:args.queries]
+
+    samples = []
+    for q in typed:
+        t0 = time.perf_counter()
+        index.suggest(q)
+        samples.append((time.perf_counter() - t0) * 1000)
+
+    report = {
+        "stations": len(index),
+        "keys": len(index.keys),
+        "build_ms": round(build_ms, 1),
+        "queries": len(typed),
+        "p50_ms": round(percentile(samples, 50), 4),
+        "p99_ms": round(percentile(samples, 99), 4),
+        "max_ms": round(max(samples), 4),
+    }
+    print(json.dumps(report))
+    if args.budget_ms is not None and report["p99_ms"] > args.budget_ms:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,270 @@
+"""
+Reproducible load test for the TicketMate API.
+
+Seeds a throwaway database with synthetic routes, users, bookings and
+notifications, then drives the FastAPI app in-process with a concurrent
+async client through four scenarios:
+
+    login_burst        POST /api/auth/login
+    search_mix         POST /api/search (popular pairs, some connections=true)
+    booking_burst      POST /api/bookings
+    notification_poll  GET  /api/notifications
+
+Prints machine-readable JSON (throughput, p50/p95/p99 per scenario).
+With --baseline, exits 1 if any scenario regressed past --threshold.
+
+    cd backend
+    python -m benchmarks.loadtest                      # local mongod, DB ticketmate_bench
+    python -m benchmarks.loadtest --mock               # mongomock-motor, no server needed
+    python -m benchmarks.loadtest --scale 5 --out run.json --baseline base.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from datetime import datetime, timedelta
+
+import httpx
+from bson import ObjectId
+
+from benchmarks.synthetic import make_routes, station_codes
+
+# import server against the bench database, never the real one
+os.environ["DB_NAME"] = os.getenv("BENCH_DB_NAME", "ticketmate_bench")
+os.environ.setdefault("DATA_VERSION_POLL", "3600")
+
+import server  # noqa: E402
+
+PASSWORD = "bench-password"
+
+# per unit of --scale
+BASE = {"users": 200, "routes": 500, "stations": 300, "bookings_per_user": 5, "notifications_per_user": 20}
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def use_mock_db():
+    try:
+        from mongomock_motor import AsyncMongoMockClient
+    except ImportError:
+        sys.exit("--mock needs mongomock-motor (pip install mongomock-motor)")
+    server.client = AsyncMongoMockClient()
+    server.db = server.client[os.environ["DB_NAME"]]
+    server.notification_writer.collection = server.db.notifications
+    server.promotion_worker.db = server.db
+
+
+async def seed(db, scale, rng):
+    n_users = BASE["users"] * scale
+    for name in ("users", "bookings", "notifications", "grievances", "train_routes", "train_stations",
+                 "counters", "waitlist_sequences", "seat_inventory", "meta"):
+        await db[name].drop()
+
+    routes = make_routes(n_trains=BASE["routes"] * scale, n_stations=BASE["stations"] * scale, seed=rng.random())
+    await db.train_routes.insert_many(routes)
+    await db.train_stations.insert_many(
+        [{"stationCode": c, "stationName": f"Station {c}"} for c in station_codes(BASE["stations"] * scale)]
+    )
+
+    # bcrypt once; every bench user shares the hash
+    hashed = server.pwd_context.hash(PASSWORD)
+    users = [{
+        "_id": ObjectId(),
+        "name": f"Bench User {i}",
+        "email": f"bench{i}@example.com",
+        "password": hashed,
+        "created_at": datetime.utcnow().isoformat(),
+    } for i in range(n_users)]
+    await db.users.insert_many(users)
+
+    bookings, notifications = [], []
+    tickets = {}  # trip id -> last waiting ticket handed out
+    start = datetime.utcnow() - timedelta(days=30)
+    for user in users:
+        uid = str(user["_id"])
+        for b in range(BASE["bookings_per_user"]):
+            status = rng.choice(["confirmed", "waiting", "cancelled"])
+            trip_id = rng.choice(routes)["trainNumber"]
+            ticket = None
+            if status == "waiting":
+                ticket = tickets[trip_id] = tickets.get(trip_id, 0) + 1
+            bookings.append({
+                "user_id": uid,
+                "trip_id": trip_id,
+                "trip_type": "train",
+                "passengers": [{"name": "P", "age": 30, "gender": "F"}],
+                "booking_type": "waiting" if status == "waiting" else "confirmed",
+                "status": status,
+                "pnr": server.gen_pnr(),
+                "route": "Demo City → Demo Destination",
+                "date": start.date().isoformat(),
+                "waiting_ticket": ticket,
+                "prediction_percentage": 50.0,
+                "created_at": (start + timedelta(minutes=b)).isoformat(),
+            })
+        for n in range(BASE["notifications_per_user"]):
+            notifications.append({
+                "user_id": uid,
+                "type": "booking",
+                "message": f"Notification {n}",
+                "timestamp": (start + timedelta(minutes=n)).isoformat(),
+                "read": bool(n % 2),
+            })
+    await db.bookings.insert_many(bookings)
+    if tickets:
+        # new joins continue after the seeded tickets
+        await db.waitlist_sequences.insert_many([{"_id": t, "seq": seq} for t, seq in tickets.items()])
+    await db.notifications.insert_many(notifications)
+    return users, routes
+
+
+class Scenario:
+    def __init__(self, name, requests, make_request):
+        self.name = name
+        self.requests = requests
+        self.make_request = make_request  # (client, i) -> coroutine returning a response
+
+    async def run(self, client, concurrency):
+        latencies, errors = [], 0
+        counter = iter(range(self.requests))
+
+        async def worker():
+            nonlocal errors
+            for i in counter:
+                t0 = time.perf_counter()
+                try:
+                    resp = await self.make_request(client, i)
+                    if resp.status_code >= 400:
+                        errors += 1
+                except Exception:
+                    errors += 1
+                latencies.append((time.perf_counter() - t0) * 1000)
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        elapsed = time.perf_counter() - started
+        return {
+            "requests": self.requests,
+            "errors": errors,
+            "throughput_rps": round(self.requests / elapsed, 1),
+            "p50_ms": round(percentile(latencies, 50), 3),
+            "p95_ms": round(percentile(latencies, 95), 3),
+            "p99_ms": round(percentile(latencies, 99), 3),
+        }
+
+
+def build_scenarios(users, routes, tokens, rng, n):
+    # search traffic is skewed: most queries hit a handful of popular pairs
+    pairs = []
+    for route in rng.sample(routes, min(50, len(routes))):
+        stops = route["stops"]
+        i, j = sorted(rng.sample(range(len(stops)), 2))
+        pairs.append((stops[i]["code"], stops[j]["code"]))
+    popular = pairs[:5]
+
+    def auth(i):
+        return {"Authorization": "Bearer " + tokens[i % len(tokens)]}
+
+    def login(client, i):
+        user = users[i % len(users)]
+        return client.post("/api/auth/login", json={"email": user["email"], "password": PASSWORD})
+
+    def search(client, i):
+        origin, destination = rng.choice(popular) if rng.random() < 0.8 else rng.choice(pairs)
+        return client.post("/api/search", headers=auth(i), json={
+            "origin": origin,
+            "destination": destination,
+            "date": f"2026-01-{rng.randint(1, 7):02d}",
+            "transport_type": "train",
+            "connections": rng.random() < 0.1,
+        })
+
+    def book(client, i):
+        return client.post("/api/bookings", headers=auth(i), json={
+            "trip_id": rng.choice(routes)["trainNumber"],
+            "trip_type": "train",
+            "passengers": [{"name": "Bench", "age": 30, "gender": "M"}],
+            "booking_type": rng.choice(["confirmed", "waiting"]),
+        })
+
+    def poll(client, i):
+        return client.get("/api/notifications", headers=auth(i))
+
+    return [
+        Scenario("login_burst", max(1, n // 10), login),
+        Scenario("search_mix", n, search),
+        Scenario("booking_burst", n, book),
+        Scenario("notification_poll", n, poll),
+    ]
+
+
+def compare(report, baseline, threshold):
+    """Return regressions: throughput down or p95 up by more than threshold %."""
+    regressions = []
+    for name, current in report["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        if current["throughput_rps"] < base["throughput_rps"] * (1 - threshold / 100):
+            regressions.append(f"{name}: throughput {base['throughput_rps']} -> {current['throughput_rps']} rps")
+        if current["p95_ms"] > base["p95_ms"] * (1 + threshold / 100):
+            regressions.append(f"{name}: p95 {base['p95_ms']} -> {current['p95_ms']} ms")
+    return regressions
+
+
+async def main(args):
+    rng = random.Random(args.seed)
+    if args.mock:
+        use_mock_db()
+
+    users, routes = await seed(server.db, args.scale, rng)
+    await server.startup()
+
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+        tokens = [server.create_token(str(u["_id"])) for u in users]
+        report = {
+            "scale": args.scale,
+            "concurrency": args.concurrency,
+            "mock": args.mock,
+            "scenarios": {},
+        }
+        for scenario in build_scenarios(users, routes, tokens, rng, args.requests):
+            report["scenarios"][scenario.name] = await scenario.run(client, args.concurrency)
+
+    await server.shutdown()
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1)
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--mock", action="store_true", help="use mongomock-motor instead of MONGO_URL")
+    parser.add_argument("--out", help="also write the JSON report here")
+    parser.add_argument("--baseline", help="previous report to compare against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed regression, percent")
+    args = parser.parse_args()
+
+    report = asyncio.run(main(args))
+    print(json.dumps(report, indent=2))
+    if args.out:
+        with open(args.out, "w") as fh:
+            json.dump(report, fh, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            regressions = compare(report, json.load(fh), args.threshold)
+        if regressions:
+            print("Regressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+            sys.exit(1)
@@ -0,0 +1,47 @@
+"""Synthetic timetable data shaped like load_to_mongo.py output."""
+import random
+
+
+def station_codes(n):
+    return [f"S{i:04d}" for i in range(n)]
+
+
+def make_routes(n_trains=3000, n_stations=800, stops_per_train=(6, 30), days=7, seed=7):
+    rng = random.Random(seed)
+    codes = station_codes(n_stations)
+    start = 10 ** 4
+    routes = []
+
+    for t in range(n_trains):
+        path = rng.sample(codes, rng.randint(*stops_per_train))
+        clock = rng.randrange(0, 24 * 60)
+        stops = []
+        for seq, code in enumerate(path):
+            arr = None if seq == 0 else clock
+            clock += rng.randint(1, 5) if seq else 0
+            dep = None if seq == len(path) - 1 else clock
+            stops.append({
+                "code": code,
+                "seq": seq,
+                "arr": None if arr is None else arr % 1440,
+                "dep": None if dep is None else dep % 1440,
+                "day": (arr if arr is not None else clock) // 1440 + 1,
+            })
+            clock += rng.randint(20, 180)
+
+        routes.append({
+            "trainNumber": str(start + t),
+            "trainName": f"Synthetic Express {t}",
+            "totalFare": rng.randint(200, 3000),
+            "duration": clock - stops[0]["dep"],
+            "stops": stops,
+            "availability": [
+                {
+                    "date": f"2026-01-{d + 1:02d}",
+                    "status": rng.choice(["AVAILABLE", "AVAILABLE", "RAC", "WL"]),
+                    "count": rng.randint(0, 200),
+                }
+                for d in range(days)
+            ],
+        })
+    return routes
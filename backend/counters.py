@@ -0,0 +1,117 @@
+import asyncio
+
+from pymongo import ReturnDocument
+
+# ---------------- COUNTERS ---------------- #
+
+# Maintained totals for /api/admin/stats, kept in a single document in
+# the "counters" collection and bumped with $inc by the writers
+# (signup, create_booking, cancel_booking). reconcile_stats() rebuilds
+# the document from the source collections if it ever drifts.
+
+STATS_ID = "stats"
+STATS_FIELDS = ("total_bookings", "total_users", "confirmed", "waiting", "cancelled")
+
+
+async def bump_stats(db, **deltas):
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    await db.counters.update_one({"_id": STATS_ID}, {"$inc": deltas}, upsert=True)
+
+
+async def read_stats(db):
+    doc = await db.counters.find_one({"_id": STATS_ID}) or {}
+    return {field: doc.get(field, 0) for field in STATS_FIELDS}
+
+
+async def reconcile_stats(db):
+    stats = dict.fromkeys(STATS_FIELDS, 0)
+
+    async for row in db.bookings.aggregate([{"$group": {"_id": "$status", "n": {"$sum": 1}}}]):
+        stats["total_bookings"] += row["n"]
+        if row["_id"] in ("confirmed", "waiting", "cancelled"):
+            stats[row["_id"]] = row["n"]
+    stats["total_users"] = await db.users.count_documents({})
+
+    await db.counters.update_one({"_id": STATS_ID}, {"$set": stats}, upsert=True)
+    return stats
+
+
+async def ensure_stats(db):
+    # first start against an existing database: seed from the collections
+    if await db.counters.find_one({"_id": STATS_ID}, {"_id": 1}) is None:
+        await reconcile_stats(db)
+
+
+# ---------------- WAITING LIST SEQUENCES ---------------- #
+
+# Every waiting booking gets a ticket from a per-trip sequence, a single
+# atomic $inc (upserted on first use) that only ever goes up, so tickets
+# are unique and in join order across any number of API processes.
+# Tickets are never rewritten: a booking's waiting_position is derived
+# when it is read, as 1 + the bookings on the trip still waiting with a
+# lower ticket, so promotions and cancellations need no renumbering and
+# positions stay 1..n without gaps.
+
+
+async def reserve_waiting_positions(db, trip_id, count=1):
+    """Reserve `count` consecutive tickets on trip_id, return the first."""
+    doc = await db.waitlist_sequences.find_one_and_update(
+        {"_id": trip_id},
+        {"$inc": {"seq": count}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    return doc["seq"] - count + 1
+
+
+async def waiting_rank(db, trip_id, ticket):
+    """
+    Current position of `ticket` on trip_id's waiting list; a count over
+    the (trip_id, status, waiting_ticket) index, no documents fetched.
+    """
+    ahead = await db.bookings.count_documents(
+        {"trip_id": trip_id, "status": "waiting", "waiting_ticket": {"$lt": ticket}}
+    )
+    return ahead + 1
+
+
+async def fill_waiting_positions(db, docs):
+    """
+    Set waiting_position on booking documents (in place) from their
+    tickets, one concurrent waiting_rank per waiting booking; the ticket
+    itself is not returned. Bookings that predate tickets keep their
+    stored position.
+    """
+    waiting = []
+    for doc in docs:
+        ticket = doc.pop("waiting_ticket", None)
+        if doc.get("status") != "waiting":
+            doc["waiting_position"] = None
+        elif ticket is not None:
+            waiting.append((ticket, doc))
+
+    ranks = await asyncio.gather(*[waiting_rank(db, doc.get("trip_id"), ticket) for ticket, doc in waiting])
+    for (_, doc), rank in zip(waiting, ranks):
+        doc["waiting_position"] = rank
+    return docs
+
+
+if __name__ == "__main__":
+    # python counters.py --reconcile
+    import asyncio
+    import os
+    import sys
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv()
+    client = AsyncIOMotorClient(os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    database = client[os.getenv("DB_NAME", "ticketmate_database")]
+
+    if "--reconcile" in sys.argv:
+        print(asyncio.run(reconcile_stats(database)))
+    else:
+        print(asyncio.run(read_stats(database)))
@@ -1,38 +1,216 @@
+import ast
+import os
+import re
+import sys
+import time
+import uuid
 import pandas as pd
-from pymongo import MongoClient
+from pymongo import InsertOne, MongoClient, ReturnDocument
+
+# the snapshot format lives with the API that reads it
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from search_engine import ROUTE_FIELDS, SearchEngine, normalize_date  # noqa: E402
+from timetable import snapshot_path, write_snapshot  # noqa: E402
 
 # ---------------- CONFIG ---------------- #
 
 MONGO_URL = "mongodb://localhost:27017"
 DB_NAME = "ticketmate_database"
 
+ROUTES_CSV = "train_routes_prices.csv"
+STATIONS_CSV = "train_stations.csv"
+CHUNK_SIZE = int(os.getenv("LOAD_CHUNK_SIZE", "2000"))
+
 # ---------------- CONNECT ---------------- #
 
 client = MongoClient(MONGO_URL)
 db = client[DB_NAME]
 
-routes_col = db.train_routes
-stations_col = db.train_stations
+# ---------------- PARSE ---------------- #
+
+# stationListParsed / availability arrive as Python-repr strings.
+# Parse them once here so the API never has to literal_eval anything.
+
+
+def _literal_list(raw):
+    if not isinstance(raw, str) or not raw:
+        return []
+    try:
+        data = ast.literal_eval(raw)
+    except Exception:
+        return []
+    return data if isinstance(data, list) else []
+
+
+def to_minutes(value):
+    """'HH:MM' -> minutes since midnight, None for '--' / 'Source' etc."""
+    if not isinstance(value, str) or ":" not in value:
+        return None
+    try:
+        hh, mm = value.strip().split(":")[:2]
+        return int(hh) * 60 + int(mm)
+    except ValueError:
+        return None
+
+
+def parse_status(value):
+    """
+    'AVAILABLE-0008' -> ('AVAILABLE', 8)
+    'RAC12'          -> ('RAC', 12)
+    'GNWL34/WL20'    -> ('WL', 20)   (current position wins)
+    anything else    -> (upper-cased text, 0)
+    """
+    text = str(value or "").strip().upper()
+    numbers = re.findall(r"\d+", text)
+    count = int(numbers[-1]) if numbers else 0
+
+    if text.startswith("AVAILABLE"):
+        return "AVAILABLE", count
+    if "RAC" in text:
+        return "RAC", count
+    if "WL" in text:
+        return "WL", count
+    return text or "UNKNOWN", 0
+
+
+def parse_stops(raw):
+    stops = []
+    for s in _literal_list(raw):
+        if not isinstance(s, dict) or not s.get("stationCode"):
+            continue
+        try:
+            day = int(s.get("dayCount") or 1)
+        except (TypeError, ValueError):
+            day = 1
+        stops.append({
+            "code": str(s["stationCode"]).strip().upper(),
+            "seq": len(stops),
+            "arr": to_minutes(s.get("arrivalTime")),
+            "dep": to_minutes(s.get("departureTime")),
+            "day": day,
+        })
+    return stops
+
+
+def parse_availability(raw):
+    out = []
+    for a in _literal_list(raw):
+        if not isinstance(a, dict):
+            continue
+        status, count = parse_status(a.get("status"))
+        out.append({
+            "date": normalize_date(a.get("date")),
+            "status": status,
+            "count": count,
+        })
+    return out
+
+
+# read_csv infers dtypes per chunk, so a chunk with one blank cell turns
+# that column into floats (12001 -> 12001.0) while the next chunk stays
+# int. Numeric columns are coerced per row so every document agrees.
+NUMERIC_COLUMNS = ("trainNumber", "totalFare", "duration")
+
+
+def to_number(value):
+    """12001.0 / '12001' -> 12001, 99.5 -> 99.5; blanks and text unchanged."""
+    if isinstance(value, bool) or value == "":
+        return value
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return value
+    if number != number or number in (float("inf"), float("-inf")):
+        return value
+    return int(number) if number.is_integer() else number
+
+
+def normalize_route(row):
+    for column in NUMERIC_COLUMNS:
+        if column in row:
+            row[column] = to_number(row[column])
+    row["stops"] = parse_stops(row.pop("stationListParsed", ""))
+    row["availability"] = parse_availability(row.get("availability", ""))
+    return row
+
+# ---------------- STREAMING LOAD ---------------- #
+
+# CSVs are read in chunks and written with unordered bulk_write into a
+# staging collection. Once a file is fully loaded the staging collection
+# is renamed over the live one (dropTarget=True), which is atomic, so the
+# API keeps serving the previous data until the swap.
+
+
+def load_csv(path, target, transform=None):
+    staging = db[target + "_staging"]
+    staging.drop()
+
+    rows = 0
+    started = time.perf_counter()
+
+    for chunk in pd.read_csv(path, chunksize=CHUNK_SIZE):
+        docs = chunk.fillna("").to_dict(orient="records")
+        if transform:
+            docs = [transform(d) for d in docs]
+        if docs:
+            staging.bulk_write([InsertOne(d) for d in docs], ordered=False)
+        rows += len(docs)
+
+    if rows == 0:
+        staging.drop()
+        print(f"⚠️  {path}: no rows, {target} left untouched")
+        return 0
+
+    staging.rename(target, dropTarget=True)
+
+    elapsed = time.perf_counter() - started
+    rate = rows / elapsed if elapsed else float(rows)
+    print(f"{target}: {rows} rows in {elapsed:.1f}s ({rate:,.0f} rows/sec)")
+    return rows
+
 
-# ---------------- LOAD CSV ---------------- #
+def bump_data_version(load_id):
+    # running API servers poll this and rebuild their search index / cache
+    doc = db.meta.find_one_and_update(
+        {"_id": "data_version"},
+        {"$inc": {"version": 1}, "$set": {"loaded_at": time.time(), "load_id": load_id}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER,
+    )
+    print("Data version:", doc["version"])
+    return doc["version"]
 
-routes = pd.read_csv("train_routes_prices.csv")
-stations = pd.read_csv("train_stations.csv")
+# ---------------- TIMETABLE SNAPSHOT ---------------- #
 
-print("Routes rows:", len(routes))
-print("Stations rows:", len(stations))
+# The search index is built once here and written as a binary snapshot
+# that API workers mmap (see timetable.py). It is stamped with the data
+# version about to be published and a fresh load id, and written before
+# the bump (which stores the same id in meta), so workers that notice the
+# new version find a matching snapshot; any mismatch, including a file
+# written by a load into another database, and they scan train_routes.
 
-# ---------------- CLEAN BEFORE INSERT ---------------- #
 
-routes = routes.fillna("").to_dict(orient="records")
-stations = stations.fillna("").to_dict(orient="records")
+def write_timetable_snapshot():
+    started = time.perf_counter()
+    engine = SearchEngine()
+    for route in db.train_routes.find({}, ROUTE_FIELDS):
+        engine.add_route(route)
 
-# ---------------- INSERT ---------------- #
+    current = db.meta.find_one({"_id": "data_version"}) or {}
+    version = current.get("version", 0) + 1
+    load_id = uuid.uuid4().hex
+    path = snapshot_path()
+    size = write_snapshot(engine, path, version, load_id)
+    print(f"timetable snapshot v{version}: {len(engine)} trains, {size:,} bytes "
+          f"in {time.perf_counter() - started:.1f}s -> {path}")
+    return version, load_id
 
-routes_col.delete_many({})
-stations_col.delete_many({})
 
-routes_col.insert_many(routes)
-stations_col.insert_many(stations)
+if __name__ == "__main__":
+    load_csv(ROUTES_CSV, "train_routes", normalize_route)
+    load_csv(STATIONS_CSV, "train_stations")
+    expected, load_id = write_timetable_snapshot()
+    if bump_data_version(load_id) != expected:
+        print("⚠️  data version moved during the load; workers will rebuild from Mongo")
 
-print("✅ Data loaded into MongoDB")
+    print("✅ Data loaded into MongoDB")
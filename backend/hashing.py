@@ -0,0 +1,77 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from fastapi import HTTPException, status
+
+# ---------------- PASSWORD HASHING ---------------- #
+
+# bcrypt burns tens of ms of CPU per call. Running it inline in an async
+# handler blocks the event loop, so hashes/verifies go to a dedicated
+# thread pool (bcrypt releases the GIL). Once workers + queue_limit calls
+# are outstanding, new ones are rejected with 503 instead of piling up.
+
+
+class PasswordHasher:
+    def __init__(self, pwd_context, workers=4, queue_limit=64):
+        self.pwd_context = pwd_context
+        self.workers = workers
+        self.queue_limit = queue_limit
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="bcrypt")
+        self._pending = 0
+
+        # queue wait metrics (seconds spent between submit and start)
+        self.rejected = 0
+        self.completed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    async def hash(self, password):
+        return await self._run(self.pwd_context.hash, password)
+
+    async def verify(self, password, hashed):
+        return await self._run(self.pwd_context.verify, password, hashed)
+
+    async def _run(self, fn, *args):
+        if self._pending >= self.workers + self.queue_limit:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is busy, retry shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        submitted = time.perf_counter()
+
+        def timed():
+            return time.perf_counter() - submitted, fn(*args)
+
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            waited, result = await loop.run_in_executor(self._pool, timed)
+        finally:
+            self._pending -= 1
+
+        self._record_wait(waited)
+        return result
+
+    def _record_wait(self, waited):
+        self.completed += 1
+        self.wait_total += waited
+        if waited > self.wait_max:
+            self.wait_max = waited
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "queue_limit": self.queue_limit,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "wait_avg_ms": (self.wait_total / self.completed * 1000) if self.completed else 0.0,
+            "wait_max_ms": self.wait_max * 1000,
+        }
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False)
@@ -0,0 +1,102 @@
+from pymongo import ASCENDING, DESCENDING, IndexModel
+
+# ---------------- INDEXES ---------------- #
+
+# Every collection the API queries, with the indexes its routes need.
+# ensure_indexes() runs on app startup; create_indexes is a no-op for
+# indexes that already exist.
+
+INDEXES = {
+    "users": [
+        IndexModel([("email", ASCENDING)], unique=True, name="email_unique"),
+    ],
+    "bookings": [
+        IndexModel([("user_id", ASCENDING), ("status", ASCENDING)], name="user_status"),
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_page"),
+        IndexModel([("resolved_at", ASCENDING), ("_id", ASCENDING)], name="resolved_at_id"),
+        IndexModel(
+            [("trip_id", ASCENDING), ("status", ASCENDING), ("waiting_ticket", ASCENDING)],
+            name="trip_status_waiting_ticket",
+        ),
+    ],
+    "notifications": [
+        IndexModel(
+            [("user_id", ASCENDING), ("timestamp", DESCENDING), ("_id", DESCENDING)],
+            name="user_timestamp_page",
+        ),
+    ],
+    "grievances": [
+        IndexModel([("user_id", ASCENDING), ("_id", ASCENDING)], name="user_id_page"),
+    ],
+}
+# train_routes gets no index: it is only read in full when the search index
+# is (re)built, and load_to_mongo.py replaces it with rename(dropTarget=True),
+# which would drop anything declared here on every load.
+
+# Query shapes issued by the routes in server.py: (collection, filter, sort).
+# verify_query_plans() explains each one and fails on a collection scan.
+QUERY_SHAPES = [
+    ("users", {"email": "probe@example.com"}, None),
+    ("bookings", {"user_id": "probe"}, [("_id", ASCENDING)]),
+    ("bookings", {"status": "waiting", "user_id": "probe"}, None),
+    ("bookings", {"trip_id": "probe", "status": "waiting", "date": "probe", "class_type": "SL"},
+     [("waiting_ticket", ASCENDING)]),
+    ("bookings", {"trip_id": "probe", "status": "waiting", "waiting_ticket": {"$lt": 1}}, [("waiting_ticket", ASCENDING)]),
+    ("bookings", {"resolved_at": {"$gte": "probe"}}, [("resolved_at", ASCENDING), ("_id", ASCENDING)]),
+    ("notifications", {"user_id": "probe"}, [("timestamp", DESCENDING), ("_id", DESCENDING)]),
+    ("grievances", {"user_id": "probe"}, [("_id", ASCENDING)]),
+]
+
+
+async def ensure_indexes(db):
+    for name, models in INDEXES.items():
+        await db[name].create_indexes(models)
+
+
+def _stages(plan):
+    yield plan.get("stage")
+    if "inputStage" in plan:
+        yield from _stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        yield from _stages(child)
+
+
+async def verify_query_plans(db):
+    """
+    Explain every declared query shape; raise RuntimeError listing
+    the ones whose winning plan contains a COLLSCAN.
+    """
+    scans = []
+    for name, query, sort in QUERY_SHAPES:
+        cursor = db[name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = (await cursor.explain())["queryPlanner"]["winningPlan"]
+        if "COLLSCAN" in _stages(plan):
+            scans.append(f"{name} {query}")
+
+    if scans:
+        raise RuntimeError("Collection scans detected: " + "; ".join(scans))
+
+
+if __name__ == "__main__":
+    # python indexes.py [--verify]
+    import asyncio
+    import os
+    import sys
+
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv()
+    client = AsyncIOMotorClient(os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    database = client[os.getenv("DB_NAME", "ticketmate_database")]
+
+    async def main():
+        await ensure_indexes(database)
+        print("✅ Indexes ensured")
+        if "--verify" in sys.argv:
+            await verify_query_plans(database)
+            print("✅ No collection scans")
+
+    asyncio.run(main())
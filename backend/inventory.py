@@ -0,0 +1,60 @@
+from pymongo.errors import DuplicateKeyError
+
+# ---------------- SEAT INVENTORY ---------------- #
+
+# One document per (trip, date, class) in "seat_inventory" holding the
+# seats left. A booking takes seats with a single conditional
+# find_one_and_update ("seats" >= n, $inc -n), so concurrent bookings can
+# never drive it below zero; when it fails the booking goes to the
+# waiting list. Cancelling a confirmed booking gives its seats back.
+#
+# Documents are created lazily, seeded from the route availability table
+# (or DEFAULT_CAPACITY for trips the timetable doesn't know).
+
+DEFAULT_CAPACITY = 72  # one sleeper coach
+
+
+def inventory_key(trip_id, travel_date, class_type):
+    return f"{trip_id}|{travel_date}|{class_type}"
+
+
+async def reserve(db, key, seats, initial):
+    """Take `seats` from the inventory at `key`. True if they were available."""
+    taken = await _take(db, key, seats)
+    if taken is not None:
+        return taken
+
+    # first booking for this trip/date/class: create the document, retry once
+    trip_id, travel_date, class_type = key.split("|", 2)
+    try:
+        await db.seat_inventory.update_one(
+            {"_id": key},
+            {"$setOnInsert": {
+                "trip_id": trip_id,
+                "date": travel_date,
+                "class": class_type,
+                "capacity": initial,
+                "seats": initial,
+            }},
+            upsert=True,
+        )
+    except DuplicateKeyError:
+        pass  # a concurrent booking created it first
+    return bool(await _take(db, key, seats))
+
+
+async def _take(db, key, seats):
+    """True if taken, False if the document exists but is short, None if missing."""
+    doc = await db.seat_inventory.find_one_and_update(
+        {"_id": key, "seats": {"$gte": seats}},
+        {"$inc": {"seats": -seats}},
+        projection={"_id": 1},
+    )
+    if doc is not None:
+        return True
+    exists = await db.seat_inventory.find_one({"_id": key}, {"_id": 1})
+    return False if exists else None
+
+
+async def release(db, key, seats):
+    await db.seat_inventory.update_one({"_id": key}, {"$inc": {"seats": seats}})
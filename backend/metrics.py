@@ -0,0 +1,182 @@
+import bisect
+import threading
+import time
+
+from pymongo import monitoring
+
+# ---------------- METRICS ---------------- #
+
+# Minimal Prometheus-style metrics: per-route latency histograms, in-flight
+# and status-code counts (MetricsMiddleware, a plain ASGI wrapper so the
+# per-request cost is a clock read and a few dict updates), plus timing of
+# every Mongo command via pymongo command monitoring (MongoCommandTimer).
+# render() produces the text exposition format served on /metrics.
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Registry:
+    def __init__(self):
+        # pymongo listeners fire on motor's worker threads
+        self._lock = threading.Lock()
+        self.histograms = {}  # (name, labels) -> Histogram
+        self.counters = {}    # (name, labels) -> int
+        self.gauges = {}      # (name, labels) -> number
+        self.collectors = []  # callables returning {(name, labels): value}
+        self.help = {}
+
+    def observe(self, name, labels, value):
+        key = (name, labels)
+        with self._lock:
+            hist = self.histograms.get(key)
+            if hist is None:
+                hist = self.histograms[key] = Histogram()
+            hist.observe(value)
+
+    def inc(self, name, labels, amount=1):
+        key = (name, labels)
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def add_gauge(self, name, labels, amount):
+        key = (name, labels)
+        with self._lock:
+            self.gauges[key] = self.gauges.get(key, 0) + amount
+
+    def render(self):
+        with self._lock:
+            histograms = {k: (h.buckets, list(h.counts), h.total, h.count) for k, h in self.histograms.items()}
+            counters = dict(self.counters)
+            gauges = dict(self.gauges)
+        for collect in self.collectors:
+            gauges.update(collect())
+
+        lines = []
+        seen = set()
+
+        def header(name, kind):
+            if name not in seen:
+                seen.add(name)
+                if name in self.help:
+                    lines.append(f"# HELP {name} {self.help[name]}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for (name, labels), value in sorted(counters.items()):
+            header(name, "counter")
+            lines.append(f"{name}{_labels(labels)} {value}")
+        for (name, labels), value in sorted(gauges.items()):
+            header(name, "gauge")
+            lines.append(f"{name}{_labels(labels)} {value}")
+        for (name, labels), (buckets, counts, total, count) in sorted(histograms.items()):
+            header(name, "histogram")
+            cumulative = 0
+            for bound, n in zip(buckets, counts):
+                cumulative += n
+                lines.append(f"{name}_bucket{_labels(labels + (('le', repr(bound)),))} {cumulative}")
+            lines.append(f"{name}_bucket{_labels(labels + (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{_labels(labels)} {total}")
+            lines.append(f"{name}_count{_labels(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels):
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+registry = Registry()
+registry.help.update({
+    "http_request_duration_seconds": "HTTP request latency by route",
+    "http_requests_total": "HTTP requests by route, method and status",
+    "http_requests_in_flight": "HTTP requests currently being served",
+    "mongo_command_duration_seconds": "Mongo command latency by collection and operation",
+    "mongo_command_failures_total": "Failed Mongo commands by collection and operation",
+})
+
+
+class MetricsMiddleware:
+    def __init__(self, app, registry=registry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        self.registry.add_gauge("http_requests_in_flight", (), 1)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.registry.add_gauge("http_requests_in_flight", (), -1)
+            # route template, not the raw path, to keep label cardinality bounded
+            route = scope.get("route")
+            path = getattr(route, "path", "unmatched")
+            method = scope["method"]
+            self.registry.observe("http_request_duration_seconds", (("method", method), ("route", path)), elapsed)
+            self.registry.inc(
+                "http_requests_total",
+                (("method", method), ("route", path), ("status", str(status_code))),
+            )
+
+
+class MongoCommandTimer(monitoring.CommandListener):
+    def __init__(self, registry=registry):
+        self.registry = registry
+        self._started = {}  # (connection, request id) -> (collection, command name)
+
+    def started(self, event):
+        # find/insert/... name the collection as the command's value;
+        # getMore carries the cursor id there and the collection separately
+        if event.command_name == "getMore":
+            target = event.command.get("collection")
+        else:
+            target = event.command.get(event.command_name)
+        collection = target if isinstance(target, str) else ""
+        self._started[(event.connection_id, event.request_id)] = (collection, event.command_name)
+
+    def succeeded(self, event):
+        labels = self._labels(event)
+        if labels is not None:
+            self.registry.observe("mongo_command_duration_seconds", labels, event.duration_micros / 1e6)
+
+    def failed(self, event):
+        labels = self._labels(event)
+        if labels is not None:
+            self.registry.observe("mongo_command_duration_seconds", labels, event.duration_micros / 1e6)
+            self.registry.inc("mongo_command_failures_total", labels)
+
+    def _labels(self, event):
+        info = self._started.pop((event.connection_id, event.request_id), None)
+        if info is None:
+            return None
+        return (("collection", info[0]), ("op", info[1]))
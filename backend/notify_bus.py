@@ -0,0 +1,93 @@
+import asyncio
+import time
+from collections import deque
+
+# ---------------- NOTIFICATION BUS ---------------- #
+
+# In-process pub/sub feeding GET /api/notifications/stream. Writers call
+# publish(user_id, doc); every open stream for that user gets the doc in
+# its own bounded buffer. An idle subscriber is a small slotted object
+# plus one parked coroutine, and costs no Mongo reads at all.
+
+
+class Subscription:
+    __slots__ = ("user_id", "pending", "waiter")
+
+    def __init__(self, user_id, size):
+        self.user_id = user_id
+        self.pending = deque(maxlen=size)  # (published_at, doc)
+        self.waiter = None
+
+    async def get(self, timeout):
+        """Next (published_at, doc), or None after `timeout` seconds idle."""
+        if not self.pending:
+            self.waiter = asyncio.get_running_loop().create_future()
+            try:
+                await asyncio.wait_for(self.waiter, timeout)
+            except asyncio.TimeoutError:
+                return None
+            finally:
+                self.waiter = None
+        return self.pending.popleft()
+
+
+class NotificationBus:
+    def __init__(self, buffer_size=100):
+        self.buffer_size = buffer_size
+        self._subscribers = {}  # user id -> {Subscription}
+        self.connections = 0
+
+        self.published = 0
+        self.delivered = 0
+        self.dropped = 0
+        # publish -> written to the client, recorded by the stream
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+
+    def subscribe(self, user_id):
+        sub = Subscription(user_id, self.buffer_size)
+        self._subscribers.setdefault(user_id, set()).add(sub)
+        self.connections += 1
+        return sub
+
+    def unsubscribe(self, sub):
+        subs = self._subscribers.get(sub.user_id)
+        if not subs or sub not in subs:
+            return
+        subs.discard(sub)
+        self.connections -= 1
+        if not subs:
+            del self._subscribers[sub.user_id]
+
+    def publish(self, user_id, doc):
+        self.published += 1
+        subs = self._subscribers.get(user_id)
+        if not subs:
+            return
+
+        published_at = time.perf_counter()
+        for sub in subs:
+            if len(sub.pending) == sub.pending.maxlen:
+                # slow consumer: the deque drops its oldest pending event
+                self.dropped += 1
+            sub.pending.append((published_at, doc))
+            if sub.waiter is not None and not sub.waiter.done():
+                sub.waiter.set_result(None)
+
+    def record_delivery(self, published_at):
+        latency = time.perf_counter() - published_at
+        self.delivered += 1
+        self.latency_total += latency
+        if latency > self.latency_max:
+            self.latency_max = latency
+
+    def stats(self):
+        return {
+            "connections": self.connections,
+            "users": len(self._subscribers),
+            "published": self.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped,
+            "fanout_avg_ms": (self.latency_total / self.delivered * 1000) if self.delivered else 0.0,
+            "fanout_max_ms": self.latency_max * 1000,
+        }
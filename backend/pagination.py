@@ -0,0 +1,62 @@
+import base64
+import json
+
+from bson import ObjectId
+from fastapi import HTTPException
+
+# ---------------- PAGINATION ---------------- #
+
+# Keyset pagination shared by the list endpoints. The cursor is an opaque
+# base64 blob holding the sort-key values of the last item returned, so
+# every page is an index range scan starting right after it — page 50
+# costs the same as page 1, and nothing is silently capped.
+
+# first page matches the old fixed 200-item responses, which clients
+# that don't follow X-Next-Cursor still rely on
+DEFAULT_LIMIT = 200
+MAX_LIMIT = 500
+
+ID_ASC = [("_id", 1)]
+NEWEST_FIRST = [("timestamp", -1), ("_id", -1)]
+
+
+def encode_cursor(doc, sort):
+    values = [str(doc["_id"]) if field == "_id" else doc.get(field) for field, _ in sort]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor, sort):
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if len(values) != len(sort):
+            raise ValueError
+        return [ObjectId(v) if field == "_id" else v for (field, _), v in zip(sort, values)]
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def _after(sort, values):
+    """
+    Filter matching everything strictly after `values` in `sort` order:
+    (a > x) OR (a == x AND b > y) ...
+    """
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {f: v for (f, _), v in zip(sort[:i], values[:i])}
+        clause[field] = {"$gt" if direction > 0 else "$lt": values[i]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+async def paginate(collection, query, sort, limit=DEFAULT_LIMIT, cursor=None, projection=None):
+    """Return (docs, next_cursor); next_cursor is None on the last page."""
+    limit = max(1, min(limit, MAX_LIMIT))
+    if cursor:
+        query = {"$and": [query, _after(sort, decode_cursor(cursor, sort))]}
+
+    # fetch one extra row to know whether another page exists
+    docs = await collection.find(query, projection).sort(sort).limit(limit + 1).to_list(limit + 1)
+    if len(docs) <= limit:
+        return docs, None
+    docs = docs[:limit]
+    return docs, encode_cursor(docs[-1], sort)
@@ -0,0 +1,163 @@
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# ---------------- PREDICTION ---------------- #
+
+# Confirmation chance for a waiting booking, learned from how earlier
+# waiting bookings were resolved: when a booking leaves the waiting list
+# it is stamped with resolved_at and an immutable outcome ("confirmed" or
+# "cancelled"), so a promoted booking cancelled later still counts as a
+# confirmation. Outcomes are counted into NumPy tables indexed by (class,
+# position bucket), plus one row per trip, so scoring any number of
+# bookings is a handful of array lookups.
+#
+# Estimates are smoothed towards a prior (the old hand-tuned class/status
+# tables) so sparse trips and buckets stay sensible:
+#     p_class = (confirmed + K * prior) / (total + K)
+#     p_trip  = (trip_confirmed + K * p_class) / (trip_total + K)
+#
+# refresh() only reads outcomes resolved since the last call and adds them
+# to the tables. resolved_at comes from each API worker's own clock and a
+# slow writer can land an outcome stamped before ones already read, so
+# every refresh re-reads the last REFRESH_OVERLAP seconds and skips the
+# _ids it has already counted.
+
+CLASSES = ("SL", "3A", "2A", "1A", "CC", "2S")
+CLASS_PRIOR = np.array([40, 70, 80, 90, 60, 50, 50], dtype=np.float64) / 100  # last: unknown class
+
+# position buckets: 0 is RAC, then WL 1, 2, 3, 4-5, 6-10, 11-20, 21-50, 51+
+BUCKET_EDGES = np.array([1, 2, 3, 4, 6, 11, 21, 51])
+BUCKET_PRIOR = np.array([60, 50, 45, 40, 35, 30, 25, 15, 10], dtype=np.float64) / 100
+UNKNOWN_POSITION = 10  # WL with no position given
+
+SMOOTHING = 5.0
+CONFIRMED_CHANCE = 98.0
+MIN_CHANCE, MAX_CHANCE = 5.0, 98.0
+REFRESH_OVERLAP = float(os.getenv("PREDICTION_REFRESH_OVERLAP", "60"))
+
+_CLASS_INDEX = {c: i for i, c in enumerate(CLASSES)}
+
+
+def class_index(class_type):
+    return _CLASS_INDEX.get((class_type or "SL").upper(), len(CLASSES))
+
+
+def bucket_index(positions):
+    """Position bucket per entry; position 0 (RAC) -> bucket 0."""
+    return np.searchsorted(BUCKET_EDGES, positions, side="right")
+
+
+class PredictionModel:
+    def __init__(self):
+        shape = (len(CLASSES) + 1, len(BUCKET_EDGES) + 1)
+        self.prior = (CLASS_PRIOR[:, None] + BUCKET_PRIOR[None, :]) / 2
+        self.confirmed = np.zeros(shape)
+        self.total = np.zeros(shape)
+        # per trip; row 0 stays empty and stands for "trip not seen"
+        self.trip_rows = {}
+        self.trip_confirmed = np.zeros((1,) + shape)
+        self.trip_total = np.zeros((1,) + shape)
+        self.watermark = None  # newest resolved_at read
+        self.recent = {}       # _id -> resolved_at, outcomes inside the overlap window
+        self.outcomes = 0
+
+    def _trip_row(self, trip_id):
+        row = self.trip_rows.get(trip_id)
+        if row is None:
+            row = self.trip_rows[trip_id] = len(self.trip_rows) + 1
+        return row
+
+    def _grow(self):
+        rows = len(self.trip_rows) + 1
+        if rows > len(self.trip_total):
+            extra = max(rows - len(self.trip_total), len(self.trip_total))  # amortised doubling
+            pad = np.zeros((extra,) + self.total.shape)
+            self.trip_confirmed = np.concatenate([self.trip_confirmed, pad])
+            self.trip_total = np.concatenate([self.trip_total, pad])
+
+    def add_outcomes(self, docs):
+        """Count resolved bookings: dicts with trip_id, class_type, joined_position, outcome."""
+        if not docs:
+            return
+        trips = np.array([self._trip_row(d.get("trip_id")) for d in docs])
+        self._grow()
+        classes = np.array([class_index(d.get("class_type")) for d in docs])
+        buckets = bucket_index(np.array([d.get("joined_position") or UNKNOWN_POSITION for d in docs]))
+        # bookings resolved before outcome was recorded fall back to their status
+        won = np.array([(d.get("outcome") or d.get("status")) == "confirmed" for d in docs], dtype=np.float64)
+
+        np.add.at(self.total, (classes, buckets), 1)
+        np.add.at(self.confirmed, (classes, buckets), won)
+        np.add.at(self.trip_total, (trips, classes, buckets), 1)
+        np.add.at(self.trip_confirmed, (trips, classes, buckets), won)
+        self.outcomes += len(docs)
+
+    def score(self, trip_ids, class_types, positions, statuses=None):
+        """
+        Confirmation chance in percent for each booking (parallel sequences).
+        Positions may be None (unknown); status "confirmed"/"CNF" scores the maximum.
+        """
+        trips = np.array([self.trip_rows.get(t, 0) for t in trip_ids], dtype=np.intp)
+        classes = np.array([class_index(c) for c in class_types], dtype=np.intp)
+        buckets = bucket_index(np.array(
+            [UNKNOWN_POSITION if p is None else p for p in positions], dtype=np.int64
+        ))
+
+        p_class = (self.confirmed[classes, buckets] + SMOOTHING * self.prior[classes, buckets]) \
+            / (self.total[classes, buckets] + SMOOTHING)
+        p_trip = (self.trip_confirmed[trips, classes, buckets] + SMOOTHING * p_class) \
+            / (self.trip_total[trips, classes, buckets] + SMOOTHING)
+        chance = np.clip(np.round(p_trip * 100, 1), MIN_CHANCE, MAX_CHANCE)
+
+        if statuses is not None:
+            confirmed = np.array([(s or "").upper() in ("CONFIRMED", "CNF") for s in statuses], dtype=bool)
+            chance[confirmed] = CONFIRMED_CHANCE
+        return chance
+
+    def score_one(self, trip_id, class_type, position, status=None):
+        return float(self.score([trip_id], [class_type], [position], [status])[0])
+
+    def _pending_query(self, since, after):
+        query = {"resolved_at": {"$ne": None} if since is None else {"$gte": since}}
+        if after is None:
+            return query
+        at, last_id = after
+        return {"$and": [query, {"$or": [{"resolved_at": {"$gt": at}}, {"resolved_at": at, "_id": {"$gt": last_id}}]}]}
+
+    async def refresh(self, db, batch=5000):
+        """Fold in outcomes resolved since the last refresh; returns how many were counted."""
+        projection = {"trip_id": 1, "class_type": 1, "joined_position": 1, "outcome": 1, "status": 1, "resolved_at": 1}
+        read = 0
+        since = None if self.watermark is None else _shift(self.watermark, -REFRESH_OVERLAP)
+        after = None  # (resolved_at, _id) paging key within this refresh
+        while True:
+            docs = await db.bookings.find(self._pending_query(since, after), projection) \
+                .sort([("resolved_at", 1), ("_id", 1)]).limit(batch).to_list(batch)
+            if not docs:
+                break
+            fresh = [d for d in docs if d["_id"] not in self.recent]
+            self.add_outcomes(fresh)
+            read += len(fresh)
+            for d in fresh:
+                self.recent[d["_id"]] = d["resolved_at"]
+            after = (docs[-1]["resolved_at"], docs[-1]["_id"])
+            if self.watermark is None or after[0] > self.watermark:
+                self.watermark = after[0]
+
+        if self.watermark is not None:
+            horizon = _shift(self.watermark, -REFRESH_OVERLAP)
+            self.recent = {_id: at for _id, at in self.recent.items() if at >= horizon}
+        return read
+
+    def stats(self):
+        return {"outcomes": self.outcomes, "trips": len(self.trip_rows)}
+
+
+def _shift(at, seconds):
+    """resolved_at (ISO string as written by the API) moved by `seconds`."""
+    try:
+        return (datetime.fromisoformat(at) + timedelta(seconds=seconds)).isoformat()
+    except (TypeError, ValueError):
+        return at
@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import time
+from datetime import datetime
+
+from pymongo import ReturnDocument
+
+from counters import bump_stats
+from inventory import release, reserve
+
+logger = logging.getLogger(__name__)
+
+# ---------------- WAITING-LIST PROMOTION ---------------- #
+
+# cancel_booking hands released seats to PromotionWorker through an
+# in-process queue (seats_released(trip_id, key)). The worker drains the
+# queue in batches and, for every released (trip, date, class), promotes
+# the head of the waiting list in ticket order while the inventory has
+# seats for it. Promotion notifications go through the write-behind
+# notification writer.
+#
+# Nothing is renumbered: waiting positions are derived from tickets when
+# they are read (counters.fill_waiting_positions), so a promotion or a
+# cancelled waiting booking leaves no gap behind, and joins in other API
+# processes never race with this worker.
+#
+# Idempotent and safe to run in every process: a booking is only
+# promoted by a conditional update on status "waiting", and seats are
+# taken from the inventory atomically before that; if the update loses
+# (cancelled, or promoted elsewhere) the seats go straight back.
+
+_STOP = object()
+
+
+class PromotionWorker:
+    def __init__(self, db, notify, batch_size=500, max_pending=10000):
+        self.db = db
+        self.notify = notify  # async (user_id, type, message)
+        self.batch_size = batch_size
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        self._task = None
+
+        self.events = 0
+        self.promoted = 0
+        self.batches = 0
+        self.lag_last = 0.0  # seconds from cancellation to settled
+        self.lag_max = 0.0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        await self._queue.put((time.perf_counter(), _STOP))
+        await self._task
+        self._task = None
+
+    async def seats_released(self, trip_id, key):
+        await self._queue.put((time.perf_counter(), (trip_id, key)))
+        self.events += 1
+
+    async def drain(self):
+        """Wait until every queued event has been settled."""
+        await self._queue.join()
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            events = [event for _, event in batch if event is not _STOP]
+            stopping = len(events) < len(batch)
+            try:
+                await self._settle(events)
+            except Exception:
+                logger.exception("waiting-list promotion failed for %d events", len(events))
+            self.batches += 1
+            self.lag_last = time.perf_counter() - batch[0][0]
+            if self.lag_last > self.lag_max:
+                self.lag_max = self.lag_last
+            for _ in batch:
+                self._queue.task_done()
+
+    async def _settle(self, events):
+        promoted = []
+        for trip_id, key in sorted(set(events)):
+            promoted += await self._promote(trip_id, key)
+        self.promoted += len(promoted)
+
+        if promoted:
+            await bump_stats(self.db, waiting=-len(promoted), confirmed=len(promoted))
+            for doc in promoted:
+                await self.notify(doc["user_id"], "promotion", f"Booking {doc['pnr']} confirmed from the waiting list")
+
+    async def _promote(self, trip_id, key):
+        """Confirm waiting bookings for `key` in ticket order while seats last."""
+        _, travel_date, class_type = key.split("|", 2)
+        promoted = []
+        while True:
+            inventory = await self.db.seat_inventory.find_one({"_id": key}, {"seats": 1})
+            free = inventory["seats"] if inventory else 0
+            if free <= 0:
+                return promoted
+            # at most `free` bookings can go up, fetch them in one query
+            heads = await self.db.bookings.find(
+                {"trip_id": trip_id, "status": "waiting", "date": travel_date, "class_type": class_type},
+                {"passengers": 1},
+            ).sort("waiting_ticket", 1).limit(free).to_list(free)
+            if not heads:
+                return promoted
+
+            for head in heads:
+                seats = max(1, len(head.get("passengers") or []))
+                # strict FIFO: a head that needs more seats than are free blocks the list
+                if not await reserve(self.db, key, seats, 0):
+                    return promoted
+
+                now = datetime.utcnow().isoformat()
+                doc = await self.db.bookings.find_one_and_update(
+                    {"_id": head["_id"], "status": "waiting"},
+                    {"$set": {
+                        "status": "confirmed",
+                        "inventory_key": key,
+                        "seats_held": seats,
+                        "waiting_position": None,
+                        "resolved_at": now,
+                        "outcome": "confirmed",
+                        "updated_at": now,
+                    }},
+                    projection={"user_id": 1, "pnr": 1},
+                    return_document=ReturnDocument.BEFORE,
+                )
+                if doc is None:
+                    # cancelled under us; give the seats back, the next pass picks up the rest
+                    await release(self.db, key, seats)
+                    break
+                promoted.append(doc)
+
+    def stats(self):
+        return {
+            "pending": self._queue.qsize(),
+            "events": self.events,
+            "promoted": self.promoted,
+            "batches": self.batches,
+            "lag_last_ms": self.lag_last * 1000,
+            "lag_max_ms": self.lag_max * 1000,
+        }
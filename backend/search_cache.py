@@ -0,0 +1,61 @@
+import time
+from collections import OrderedDict
+
+# ---------------- SEARCH CACHE ---------------- #
+
+# LRU + TTL cache in front of search_tickets, keyed on the normalized
+# (origin, destination, date, transport_type) tuple. Misses are not
+# coalesced: the computation is in-memory and never awaits, so two
+# requests cannot be computing the same key at once. Entries are
+# tagged with the route data version that load_to_mongo.py bumps, and
+# the whole cache is dropped when that version changes.
+
+
+class SearchCache:
+    def __init__(self, maxsize=5000, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.version = None
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+
+    def set_version(self, version):
+        if version != self.version:
+            self.version = version
+            self.clear()
+
+    def clear(self):
+        self._entries.clear()
+
+    async def get_or_compute(self, key, compute):
+        entry = self._entries.get(key)
+        if entry is not None:
+            value, expires_at = entry
+            if expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._entries[key]
+
+        self.misses += 1
+        version = self.version
+        value = await compute()
+        # a reload finished while we computed: don't cache stale results
+        if version == self.version:
+            self._store(key, value)
+        return value
+
+    def _store(self, key, value):
+        self._entries[key] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def stats(self):
+        return {
+            "size": len(self._entries),
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
@@ -0,0 +1,221 @@
+from collections import defaultdict
+
+# ---------------- SEARCH ENGINE ---------------- #
+
+# In-memory station -> train inverted index.
+# Built once from train_routes (at startup / on reload) so that
+# POST /api/search never touches Mongo. Routes are stored pre-parsed
+# by load_to_mongo.py (stops / availability arrays), so building the
+# index does no string evaluation either.
+
+ROUTE_FIELDS = {
+    "trainNumber": 1,
+    "trainName": 1,
+    "totalFare": 1,
+    "duration": 1,
+    "availability": 1,
+    "stops": 1,
+}
+
+
+MINUTES_PER_DAY = 24 * 60
+MIN_LAYOVER = 30
+MAX_LAYOVER = 12 * 60
+
+
+def format_minutes(minutes):
+    if minutes is None:
+        return ""
+    minutes %= MINUTES_PER_DAY
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def normalize_date(value):
+    """'2023-12-02' stays as is; '2-12-2023' (d-m-Y, the CSV format) -> '2023-12-02'."""
+    parts = str(value).strip().split("-")
+    if len(parts) != 3 or not all(p.isdigit() for p in parts):
+        return str(value).strip()
+    if len(parts[0]) == 4:
+        y, m, d = parts
+    else:
+        d, m, y = parts
+    return f"{int(y):04d}-{int(m):02d}-{int(d):02d}"
+
+
+def _seat_table(route_doc):
+    # availability is [{date, status, count}] (see load_to_mongo.py)
+    table = {}
+    for a in route_doc.get("availability") or []:
+        if a.get("date"):
+            table[normalize_date(a["date"])] = (a.get("status", "UNKNOWN"), a.get("count", 0))
+    return table
+
+
+def _absolute(minutes, day):
+    # minutes since departure day 00:00, so multi-day legs subtract cleanly
+    if minutes is None:
+        return None
+    return (day - 1) * MINUTES_PER_DAY + minutes
+
+
+class SearchEngine:
+    def __init__(self):
+        self.trains = []                   # train idx -> route info
+        self.stops = []                    # train idx -> [(code, arr, dep)], absolute minutes
+        self.postings = defaultdict(list)  # station code -> [(train idx, stop pos)]
+        self.by_number = {}                # trainNumber -> route info
+
+    def add_route(self, route):
+        stops = route.get("stops")
+        if not stops:
+            return
+
+        idx = len(self.trains)
+        train = {
+            "number": route.get("trainNumber"),
+            "name": route.get("trainName"),
+            "price": route.get("totalFare", 0),
+            "duration": route.get("duration", ""),
+            "seats": _seat_table(route),  # date -> (AVAILABLE | RAC | WL | ..., count)
+        }
+        self.trains.append(train)
+        self.by_number[str(train["number"])] = train
+
+        timeline = []
+        seen = set()
+        for pos, stop in enumerate(stops):
+            code = stop["code"]
+            day = stop.get("day") or 1
+            timeline.append((code, _absolute(stop.get("arr"), day), _absolute(stop.get("dep"), day)))
+            # a train visiting a station twice keeps its first stop only
+            if code in seen:
+                continue
+            seen.add(code)
+            self.postings[code].append((idx, pos))
+        self.stops.append(timeline)
+
+    def search(self, origin, destination):
+        """
+        Intersect the origin and destination posting lists and keep trains
+        where the origin stop comes before the destination stop.
+        Returns [(train info, departure, arrival)].
+        """
+        from_list = self.postings.get(origin)
+        to_list = self.postings.get(destination)
+        if not from_list or not to_list:
+            return []
+
+        arrivals = dict(to_list)
+        matches = []
+        for idx, pos in from_list:
+            to_pos = arrivals.get(idx)
+            if to_pos is None or pos >= to_pos:
+                continue
+            stops = self.stops[idx]
+            matches.append((self.trains[idx], format_minutes(stops[pos][2]), format_minutes(stops[to_pos][1])))
+        return matches
+
+    def connections(self, origin, destination, min_layover=MIN_LAYOVER, max_layover=MAX_LAYOVER, limit=20):
+        """
+        One-transfer itineraries origin -> via -> destination on two
+        different trains, ranked by total door-to-door minutes.
+        Trains are assumed to run daily, so the layover wraps at midnight.
+        """
+        from_list = self.postings.get(origin)
+        to_list = self.postings.get(destination)
+        if not from_list or not to_list:
+            return []
+
+        # via station -> legs that reach the destination from it
+        feeders = defaultdict(list)
+        for t2, k in to_list:
+            stops = self.stops[t2]
+            arr_d = stops[k][1]
+            if arr_d is None:
+                continue
+            for p in range(k):
+                dep_v = stops[p][2]
+                if dep_v is not None and arr_d > dep_v:
+                    feeders[stops[p][0]].append((t2, p, k, dep_v, arr_d))
+        if not feeders:
+            return []
+
+        best = {}  # (t1, t2) -> itinerary, fastest transfer per train pair
+        for t1, i in from_list:
+            stops = self.stops[t1]
+            dep_o = stops[i][2]
+            if dep_o is None:
+                continue
+            for q in range(i + 1, len(stops)):
+                via, arr_v, _dep = stops[q]
+                if via == destination:
+                    break
+                legs = feeders.get(via)
+                if not legs or arr_v is None:
+                    continue
+                first = arr_v - dep_o
+                for t2, p, k, dep_v, arr_d in legs:
+                    if t2 == t1:
+                        continue
+                    layover = (dep_v - arr_v) % MINUTES_PER_DAY
+                    if layover < min_layover or layover > max_layover:
+                        continue
+                    total = first + layover + (arr_d - dep_v)
+                    current = best.get((t1, t2))
+                    if current is None or total < current[0]:
+                        best[(t1, t2)] = (total, layover, (t1, i, q), (t2, p, k))
+
+        ranked = sorted(best.values(), key=lambda c: c[0])[:limit]
+        return [
+            {
+                "duration": total,
+                "layover": layover,
+                "legs": [self._leg(*first), self._leg(*second)],
+            }
+            for total, layover, first, second in ranked
+        ]
+
+    def _leg(self, idx, from_pos, to_pos):
+        stops = self.stops[idx]
+        return (
+            self.trains[idx],
+            stops[from_pos][0],
+            stops[to_pos][0],
+            format_minutes(stops[from_pos][2]),
+            format_minutes(stops[to_pos][1]),
+        )
+
+    @staticmethod
+    def availability(train, travel_date):
+        """
+        Seat state for train on travel_date (ISO or d-m-Y):
+        {"status": AVAILABLE | RAC | WL | ... | UNKNOWN, "count": seats or list position}
+        """
+        status, count = train["seats"].get(normalize_date(travel_date), ("UNKNOWN", 0))
+        return {"status": status, "count": count}
+
+    def route_counts(self):
+        """station code -> number of trains calling there"""
+        return {code: len(postings) for code, postings in self.postings.items()}
+
+    def __len__(self):
+        return len(self.trains)
+
+
+async def read_data_version(db):
+    # bumped by load_to_mongo.py after every successful load
+    doc = await db.meta.find_one({"_id": "data_version"})
+    return doc.get("version", 0) if doc else 0
+
+
+async def read_data_stamp(db):
+    # (version, load id) of the last load; the id names its timetable snapshot
+    doc = await db.meta.find_one({"_id": "data_version"}) or {}
+    return doc.get("version", 0), doc.get("load_id", "")
+
+
+async def build_search_engine(db):
+    engine = SearchEngine()
+    async for route in db.train_routes.find({}, ROUTE_FIELDS):
+        engine.add_route(route)
+    return engine
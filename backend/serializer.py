@@ -0,0 +1,64 @@
+import json
+from datetime import date, datetime
+
+from bson import ObjectId
+from fastapi import Response
+
+# ---------------- SERIALIZER ---------------- #
+
+# Routes ask Mongo only for the fields the frontend renders (PROJECTIONS)
+# and hand the raw documents to the response helpers below. Documents are
+# renamed in place (_id -> id, no copy) and encoded to bytes in one pass
+# by the C json encoder, with ObjectId / datetime handled by its default
+# hook — FastAPI's jsonable_encoder walk is skipped entirely.
+
+PROJECTIONS = {
+    "booking": {
+        "trip_id": 1, "trip_type": 1, "passengers": 1, "booking_type": 1,
+        "status": 1, "pnr": 1, "route": 1, "date": 1, "waiting_position": 1,
+        "waiting_ticket": 1,  # turned into waiting_position by fill_waiting_positions
+        "prediction_percentage": 1, "created_at": 1, "class_type": 1,
+    },
+    "notification": {"type": 1, "message": 1, "timestamp": 1, "read": 1},
+    "grievance": {"booking_id": 1, "category": 1, "description": 1, "status": 1, "created_at": 1},
+}
+
+
+def _default(value):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+_encoder = json.JSONEncoder(
+    default=_default,
+    ensure_ascii=False,
+    allow_nan=False,
+    separators=(",", ":"),
+)
+
+
+def prepare(doc):
+    """Rename _id -> id in place and return the same dict."""
+    if doc is not None and "_id" in doc:
+        doc["id"] = doc.pop("_id")
+    return doc
+
+
+def encode(content):
+    return _encoder.encode(content).encode("utf-8")
+
+
+def json_response(content, headers=None):
+    return Response(content=encode(content), media_type="application/json", headers=headers)
+
+
+def docs_response(docs, next_cursor=None):
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return json_response([prepare(d) for d in docs], headers)
+
+
+def doc_response(doc):
+    return json_response(prepare(doc))
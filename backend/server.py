@@ -1,18 +1,43 @@
-from fastapi import FastAPI, HTTPException, Depends, APIRouter, status
+from fastapi import FastAPI, HTTPException, Depends, APIRouter, Query, Request, status
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from motor.motor_asyncio import AsyncIOMotorClient
-from pydantic import BaseModel, EmailStr
+from pydantic import BaseModel, EmailStr, ValidationError
 from passlib.context import CryptContext
 from jose import jwt, JWTError
 from datetime import datetime, timedelta, date
 from dotenv import load_dotenv
 from typing import List, Optional
 from bson import ObjectId
+from search_engine import SearchEngine, build_search_engine, normalize_date, read_data_stamp, read_data_version
+from inventory import DEFAULT_CAPACITY, inventory_key, release as release_seats, reserve as reserve_seats
+from search_cache import SearchCache
+from station_index import MAX_SUGGESTIONS, StationIndex, build_station_index
+from timetable import open_snapshot, snapshot_path
+from indexes import ensure_indexes, verify_query_plans
+from auth_cache import PrincipalCache
+from hashing import PasswordHasher
+from counters import (
+    bump_stats, ensure_stats, fill_waiting_positions, read_stats, reconcile_stats, reserve_waiting_positions,
+)
+from pagination import paginate, DEFAULT_LIMIT, MAX_LIMIT, ID_ASC, NEWEST_FIRST
+from serializer import PROJECTIONS, doc_response, docs_response, encode, json_response, prepare
+from notify_bus import NotificationBus
+from write_behind import WriteBehindQueue
+from prediction import CLASSES, PredictionModel
+from promotion import PromotionWorker
+from admission import AdmissionMiddleware, LoadShedder, LoopLagMonitor, RateLimiter
+from metrics import MetricsMiddleware, MongoCommandTimer, registry as metrics_registry
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+import asyncio
+import logging
 import os
 import random
 import string
-import ast
+
+logger = logging.getLogger(__name__)
 
 pwd_context = CryptContext(
     schemes=["bcrypt"],
@@ -26,26 +51,111 @@ MONGO_URL = os.getenv("MONGO_URL", "mongodb://localhost:27017")
 DB_NAME = os.getenv("DB_NAME", "ticketmate_database")
 SECRET_KEY = os.getenv("SECRET_KEY", "local-dev-secret")
 ALGORITHM = "HS256"
+# fail startup if any route query would scan a whole collection
+VERIFY_QUERY_PLANS = os.getenv("VERIFY_QUERY_PLANS", "") == "1"
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "300"))
+HASH_WORKERS = int(os.getenv("HASH_WORKERS", "4"))
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", "64"))
+SEARCH_CACHE_SIZE = int(os.getenv("SEARCH_CACHE_SIZE", "5000"))
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", "300"))
+DATA_VERSION_POLL = float(os.getenv("DATA_VERSION_POLL", "30"))
+MAX_BATCH_SEARCH = int(os.getenv("MAX_BATCH_SEARCH", "50"))
+MAX_BULK_BOOKINGS = int(os.getenv("MAX_BULK_BOOKINGS", "200"))
+STREAM_HEARTBEAT = float(os.getenv("STREAM_HEARTBEAT", "15"))
+PREDICTION_REFRESH = float(os.getenv("PREDICTION_REFRESH", "300"))
+MAX_BATCH_PREDICT = int(os.getenv("MAX_BATCH_PREDICT", "500"))
+# admission control: shed heavy endpoints while the event loop lags
+LOOP_LAG_INTERVAL = float(os.getenv("LOOP_LAG_INTERVAL", "0.05"))
+LOOP_LAG_THRESHOLD = float(os.getenv("LOOP_LAG_THRESHOLD", "0.1"))
+MAX_HEAVY_IN_FLIGHT = int(os.getenv("MAX_HEAVY_IN_FLIGHT", "64"))
+HEAVY_PATHS = ("/api/search", "/api/bookings/bulk", "/api/predict/batch", "/api/admin/")
+# per-user token bucket; RATE_LIMIT_RATE=0 turns it off
+RATE_LIMIT_RATE = float(os.getenv("RATE_LIMIT_RATE", "20"))
+RATE_LIMIT_BURST = float(os.getenv("RATE_LIMIT_BURST", "40"))
+RATE_LIMIT_EXEMPT = {"/api/me"}
 
 # ---------------- APP ---------------- #
 
 app = FastAPI(title="TicketMate Local API")
 
+loop_lag = LoopLagMonitor(LOOP_LAG_INTERVAL)
+load_shedder = LoadShedder(loop_lag, HEAVY_PATHS, LOOP_LAG_THRESHOLD, MAX_HEAVY_IN_FLIGHT)
+rate_limiter = RateLimiter(RATE_LIMIT_RATE, RATE_LIMIT_BURST)
+
+# inside CORS, so 503s still carry the CORS headers
+app.add_middleware(AdmissionMiddleware, shedder=load_shedder)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After"],
 )
+app.add_middleware(MetricsMiddleware)
 
 # ---------------- DB ---------------- #
 
-client = AsyncIOMotorClient(MONGO_URL)
+client = AsyncIOMotorClient(MONGO_URL, event_listeners=[MongoCommandTimer()])
 db = client[DB_NAME]
 
 api_router = APIRouter(prefix="/api")
+
+# station -> train index, swapped wholesale on reload
+search_engine = SearchEngine()
+station_index = StationIndex([], {})
+search_cache = SearchCache(SEARCH_CACHE_SIZE, SEARCH_CACHE_TTL)
+data_version_task = None
+
+
+async def reload_search_engine():
+    global search_engine, station_index
+    version, load_id = await read_data_stamp(db)
+    # the mmap snapshot written by load_to_mongo.py, shared by every worker on
+    # the host; scan train_routes only when it is missing or out of date
+    engine = open_snapshot(snapshot_path(), version, load_id) or await build_search_engine(db)
+    station_index = await build_station_index(db, engine.route_counts())
+    search_engine = engine
+    search_cache.set_version(version)
+    search_cache.clear()
+
+
+async def watch_data_version():
+    # pick up reloads done by load_to_mongo.py without a restart
+    while True:
+        await asyncio.sleep(DATA_VERSION_POLL)
+        try:
+            if await read_data_version(db) != search_cache.version:
+                await reload_search_engine()
+        except Exception:
+            logger.exception("search index reload failed; keeping version %s", search_cache.version)
+
+
+# confirmation-chance tables, topped up from newly resolved waiting bookings
+prediction_model = PredictionModel()
+prediction_task = None
+
+
+async def watch_outcomes():
+    while True:
+        await asyncio.sleep(PREDICTION_REFRESH)
+        try:
+            await prediction_model.refresh(db)
+        except Exception:
+            logger.exception("prediction model refresh failed")
+
 security = HTTPBearer()
+principal_cache = PrincipalCache(PRINCIPAL_CACHE_SIZE, PRINCIPAL_CACHE_TTL)
+password_hasher = PasswordHasher(pwd_context, HASH_WORKERS, HASH_QUEUE_LIMIT)
+notification_bus = NotificationBus()
+# notification inserts are off the request path, flushed in batches
+notification_writer = WriteBehindQueue(
+    db.notifications,
+    batch_size=int(os.getenv("NOTIFY_BATCH_SIZE", "500")),
+    flush_interval=float(os.getenv("NOTIFY_FLUSH_INTERVAL", "0.05")),
+    max_pending=int(os.getenv("NOTIFY_MAX_PENDING", "10000")),
+)
 
 # ---------------- MODELS ---------------- #
 
@@ -68,6 +178,8 @@ class SearchRequest(BaseModel):
     destination: str
     date: str
     transport_type: str  # train | flight
+    connections: bool = False  # also return one-transfer itineraries
+    class_type: str = "SL"  # class whose seats_available is reported
 
 class Passenger(BaseModel):
     name: str
@@ -78,11 +190,19 @@ class BookingCreate(BaseModel):
     trip_id: str
     trip_type: str
     passengers: List[Passenger]
-    booking_type: str  # confirmed | waiting
+    booking_type: str  # confirmed | waiting (requested; seat inventory decides)
+    travel_date: Optional[str] = None  # defaults to today
+    class_type: str = "SL"
 
 class PredictionRequest(BaseModel):
-    current_status: str
+    current_status: str  # WL | RAC | CNF
     class_type: str
+    trip_id: Optional[str] = None
+    waiting_position: Optional[int] = None
+
+class PredictionBatchRequest(BaseModel):
+    items: List[PredictionRequest] = []
+    booking_ids: List[str] = []  # the caller's own bookings, scored as stored
 
 class GrievanceCreate(BaseModel):
     booking_id: str
@@ -98,36 +218,63 @@ def create_token(user_id: str):
         algorithm=ALGORITHM,
     )
 
-def serialize_mongo(doc):
-    if not doc:
-        return None
-    out = dict(doc)
-    _id = out.pop("_id", None)
-    if _id is not None:
-        out["id"] = str(_id)
-    # convert any ObjectId values in top-level fields
-    for k, v in list(out.items()):
-        if isinstance(v, ObjectId):
-            out[k] = str(v)
-    return out
+async def add_notification(user_id: str, type_: str, message: str):
+    doc = {
+        "_id": ObjectId(),
+        "user_id": user_id,
+        "type": type_,
+        "message": message,
+        "timestamp": datetime.utcnow().isoformat(),
+        "read": False
+    }
+    await notification_writer.put(doc)
+    notification_bus.publish(user_id, doc)
+
+
+# promotes waiting bookings as cancellations free seats
+promotion_worker = PromotionWorker(db, add_notification)
 
 
 def gen_pnr():
     return "PNR" + "".join(random.choices(string.digits, k=6))
 
 
-def MathPrediction(booking_type: str, trip_type: str):
-    base = 50
-    if booking_type == "waiting":
-        base -= 20
-    if trip_type == "flight":
-        base += 10
-    return float(min(max(base + random.randint(-10, 10), 5), 98))
+def gen_pnrs(count: int):
+    # distinct within the batch
+    pnrs = set()
+    while len(pnrs) < count:
+        pnrs.add(gen_pnr())
+    return list(pnrs)
+
+
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
 ):
-    token = credentials.credentials
+    user = await resolve_principal(credentials.credentials)
+    if request.url.path not in RATE_LIMIT_EXEMPT:
+        rate_limiter.check(user["id"])
+    return user
+
+
+async def get_stream_user(request: Request, token: Optional[str] = None):
+    # EventSource cannot send headers, so streams also accept ?token=
+    header = request.headers.get("authorization", "")
+    if header.lower().startswith("bearer "):
+        token = header[7:]
+    if not token:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated"
+        )
+    return await resolve_principal(token)
+
+
+async def resolve_principal(token: str):
+    cached = principal_cache.get(token)
+    if cached is not None:
+        return cached
 
     try:
         payload = jwt.decode(
@@ -160,11 +307,13 @@ async def get_current_user(
             detail="User not found"
         )
 
-    return {
+    principal = {
         "id": str(user["_id"]),
         "name": user.get("name"),
         "email": user.get("email")
     }
+    principal_cache.put(token, principal, payload.get("exp"))
+    return principal
 
 # ---------------- AUTH ---------------- #
 
@@ -173,7 +322,7 @@ async def signup(user: UserSignup):
     if await db.users.find_one({"email": user.email}):
         raise HTTPException(status_code=400, detail="Email already registered")
 
-    hashed_password = pwd_context.hash(user.password)  # ✅ STRING ONLY
+    hashed_password = await password_hasher.hash(user.password)  # ✅ STRING ONLY
 
     result = await db.users.insert_one({
         "name": user.name,
@@ -184,6 +333,7 @@ async def signup(user: UserSignup):
 
     user_id = str(result.inserted_id)
     token = create_token(user_id)
+    await bump_stats(db, total_users=1)
 
     return {
         "access_token": token,
@@ -202,7 +352,7 @@ async def login(user: UserLogin):
     if not found:
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
-    if not pwd_context.verify(user.password, found["password"]):
+    if not await password_hasher.verify(user.password, found["password"]):
         raise HTTPException(status_code=401, detail="Invalid credentials")
 
     user_id = str(found["_id"])
@@ -226,36 +376,11 @@ async def me(user: dict = Depends(get_current_user)):
 
 # ================= SEARCH (REAL DATA - DO NOT TOUCH OTHER PARTS) =================
 # Mongo collections already exist and are populated from CSV:
-# - train_schedules
-# - train_prices
-# Use Motor async queries only.
+# - train_routes
+# - train_stations
+# Routes are served from the in-memory SearchEngine (see search_engine.py).
 # DO NOT modify auth, models, or other routes.
-def _extract_available_seats(route_doc):
-    """
-    availability field is a STRING like:
-    "[{'date': '2-12-2023', 'status': 'AVAILABLE-0008'}, ...]"
-    """
-    raw = route_doc.get("availability")
-    if not raw:
-        return 0
-
-    try:
-        data = ast.literal_eval(raw)
-        if not isinstance(data, list):
-            return 0
-
-        # pick first AVAILABLE-XXXX
-        for d in data:
-            status = d.get("status", "")
-            if "AVAILABLE" in status:
-                return int(status.split("-")[-1])
-    except Exception:
-        return 0
-
-    return 0
-
-@api_router.post("/search")
-async def search_tickets(req: SearchRequest, user: dict = Depends(get_current_user)):
+def _search_key(req: SearchRequest):
     if req.transport_type != "train":
         raise HTTPException(status_code=400, detail="Only train search supported")
 
@@ -265,102 +390,338 @@ async def search_tickets(req: SearchRequest, user: dict = Depends(get_current_us
     if not origin or not destination:
         raise HTTPException(status_code=400, detail="Origin and destination required")
 
-    # 1. Load all routes that start/end roughly matching (cheap pre-filter)
-    cursor = db.train_routes.find({
-        "fromStnCode": origin
-    })
+    return (origin, destination, normalize_date(req.date), req.transport_type, req.connections)
 
-    routes = await cursor.to_list(1000)
-    results = []
 
-    for route in routes:
-        raw_station_list = route.get("stationListParsed")
+async def _cached_search(key):
+    origin, destination, travel_date, _transport, connections = key
+    return await search_cache.get_or_compute(
+        key, lambda: _search_trains(origin, destination, travel_date, connections)
+    )
 
-        if not raw_station_list:
-            continue
 
-        # 2. stationListParsed IS A STRING -> convert safely
-        try:
-            stations = ast.literal_eval(raw_station_list)
-        except Exception:
-            continue
+async def _live_seats(result, travel_date, class_type):
+    # cached results carry the timetable's availability; seats already taken
+    # by bookings live in seat_inventory, read fresh on every search
+    keys = {inventory_key(str(r["id"]), travel_date, class_type.strip().upper()): n
+            for n, r in enumerate(result["results"])}
+    if not keys:
+        return result
+    rows = list(result["results"])
+    async for inv in db.seat_inventory.find({"_id": {"$in": list(keys)}}, {"seats": 1}):
+        n = keys[inv["_id"]]
+        rows[n] = {**rows[n], "seats_available": max(inv["seats"], 0)}
+    return {**result, "results": rows}
 
-        if not isinstance(stations, list):
-            continue
 
-        codes = [s.get("stationCode") for s in stations if "stationCode" in s]
+@api_router.post("/search")
+async def search_tickets(req: SearchRequest, user: dict = Depends(get_current_user)):
+    key = _search_key(req)
+    return await _live_seats(await _cached_search(key), key[2], req.class_type)
 
-        if origin not in codes or destination not in codes:
-            continue
 
-        o_idx = codes.index(origin)
-        d_idx = codes.index(destination)
+@api_router.post("/search/batch")
+async def search_batch(reqs: List[SearchRequest], user: dict = Depends(get_current_user)):
+    """
+    Many searches in one request (result pages, flexible dates).
+    Results come back as a list in request order, one entry per search
+    (or {"error": ...}); identical queries are computed once and the rest
+    run concurrently through the search cache.
+    """
+    if len(reqs) > MAX_BATCH_SEARCH:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SEARCH} searches per batch")
 
-        if o_idx >= d_idx:
-            continue
+    keys = []
+    for req in reqs:
+        try:
+            keys.append(_search_key(req))
+        except HTTPException as exc:
+            keys.append({"error": exc.detail})
 
-        dep = stations[o_idx].get("departureTime", "")
-        arr = stations[d_idx].get("arrivalTime", "")
+    unique = list(dict.fromkeys(k for k in keys if isinstance(k, tuple)))
+    computed = dict(zip(unique, await asyncio.gather(*[_cached_search(k) for k in unique])))
+    # live seats per request: the same route can be asked for different classes
+    live = iter(await asyncio.gather(*[
+        _live_seats(computed[k], k[2], req.class_type) for req, k in zip(reqs, keys) if isinstance(k, tuple)
+    ]))
+    return {"results": [next(live) if isinstance(k, tuple) else k for k in keys]}
 
+
+async def _search_trains(origin, destination, travel_date, connections=False):
+    # posting-list intersection over the in-memory index (no Mongo, no parsing)
+    results = []
+    for train, dep, arr in search_engine.search(origin, destination):
+        availability = search_engine.availability(train, travel_date)
         results.append({
-            "id": route.get("trainNumber"),
-            "name": route.get("trainName"),
+            "id": train["number"],
+            "name": train["name"],
             "from": origin,
             "to": destination,
-            "date": req.date,
-            "price": route.get("totalFare", 0),
-            "seats_available": _extract_available_seats(route),
-            "number": route.get("trainNumber"),
+            "date": travel_date,
+            "price": train["price"],
+            "seats_available": availability["count"] if availability["status"] == "AVAILABLE" else 0,
+            "availability": availability,
+            "number": train["number"],
             "departure": dep,
             "arrival": arr,
-            "duration": str(route.get("duration", "")) + " min"
+            "duration": str(train["duration"]) + " min"
         })
 
-    return {"results": results}
+    if not connections:
+        return {"results": results}
+
+    itineraries = []
+    for c in search_engine.connections(origin, destination):
+        legs = [{
+            "id": train["number"],
+            "name": train["name"],
+            "number": train["number"],
+            "from": frm,
+            "to": to,
+            "departure": dep,
+            "arrival": arr,
+            "price": train["price"],
+            "availability": search_engine.availability(train, travel_date),
+        } for train, frm, to, dep, arr in c["legs"]]
+        itineraries.append({
+            "via": legs[0]["to"],
+            "date": travel_date,
+            "legs": legs,
+            "price": sum(leg["price"] or 0 for leg in legs),
+            "layover": str(c["layover"]) + " min",
+            "duration": str(c["duration"]) + " min",
+        })
+    return {"results": results, "connections": itineraries}
+
+
+@api_router.post("/admin/search/reload")
+async def reload_search(user: dict = Depends(get_current_user)):
+    await reload_search_engine()
+    return {"detail": "reloaded", "trains": len(search_engine), "stations": len(station_index)}
+
+
+@api_router.get("/stations/suggest")
+async def suggest_stations(
+    q: str = Query("", max_length=64),
+    limit: int = Query(10, ge=1, le=MAX_SUGGESTIONS),
+    user: dict = Depends(get_current_user),
+):
+    """Typeahead for origin / destination, served from memory."""
+    return json_response(
+        {"stations": station_index.suggest(q, limit)},
+        headers={"Cache-Control": "private, max-age=300"},
+    )
 
 # ---------------- BOOKINGS (FIXED) ---------------- #
 
-@api_router.post("/bookings")
-async def create_booking(booking: BookingCreate, user: dict = Depends(get_current_user)):
-    pnr = gen_pnr()
-    status_val = "confirmed" if booking.booking_type == "confirmed" else "waiting"
-    waiting_pos = None
-    if status_val == "waiting":
-        waiting_pos = (await db.bookings.count_documents({"status": "waiting"})) + 1
+def _initial_seats(trip_id: str, travel_date: str):
+    # seed for a new inventory document, from the route availability table
+    # (the trip is known, _check_booking made sure of it)
+    train = search_engine.by_number.get(trip_id)
+    state = search_engine.availability(train, travel_date)
+    if state["status"] == "UNKNOWN":
+        return DEFAULT_CAPACITY
+    return state["count"] if state["status"] == "AVAILABLE" else 0
+
+
+async def _hold_seats(booking: BookingCreate, travel_date: str):
+    """Try to take seats for every passenger; ("confirmed", hold) or ("waiting", {})."""
+    key = inventory_key(booking.trip_id, travel_date, booking.class_type)
+    seats = len(booking.passengers)
+    if await reserve_seats(db, key, seats, _initial_seats(booking.trip_id, travel_date)):
+        return "confirmed", {"inventory_key": key, "seats_held": seats}
+    return "waiting", {}
 
-    booking_doc = {
+
+def _check_booking(booking: BookingCreate):
+    """
+    Reject what would otherwise open or drain an inventory that doesn't
+    exist (400 / 404); normalises class_type in place, returns the travel date.
+    """
+    booking.class_type = booking.class_type.strip().upper()
+    if booking.class_type not in CLASSES:
+        raise HTTPException(status_code=400, detail=f"class_type must be one of {', '.join(CLASSES)}")
+    if not booking.passengers:
+        raise HTTPException(status_code=400, detail="At least one passenger required")
+    if search_engine.by_number.get(booking.trip_id) is None:
+        raise HTTPException(status_code=404, detail="Trip not found")
+    if not booking.travel_date:
+        return date.today().isoformat()
+    travel_date = normalize_date(booking.travel_date)
+    try:
+        date.fromisoformat(travel_date)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="travel_date must be YYYY-MM-DD or DD-MM-YYYY")
+    return travel_date
+
+
+def _booking_doc(booking: BookingCreate, user: dict, pnr: str, status_val: str, ticket,
+                 travel_date: str, hold: dict):
+    return {
         "user_id": user["id"],
         "trip_id": booking.trip_id,
         "trip_type": booking.trip_type,
         "passengers": [p.dict() for p in booking.passengers],
         "booking_type": booking.booking_type,
+        "class_type": booking.class_type,
         "status": status_val,
         "pnr": pnr,
         "route": "Demo City → Demo Destination",
-        "date": date.today().isoformat(),
-        "waiting_position": waiting_pos,
-        "prediction_percentage": MathPrediction(booking.booking_type, booking.trip_type),
-        "created_at": datetime.utcnow().isoformat()
+        "date": travel_date,
+        # the position is derived from the ticket on read (fill_waiting_positions);
+        # joined_position is set by _place_waiting once the booking is in
+        "waiting_ticket": ticket,
+        "joined_position": None,
+        "prediction_percentage": prediction_model.score_one(
+            booking.trip_id, booking.class_type, None, status_val
+        ),
+        "created_at": datetime.utcnow().isoformat(),
+        **hold
     }
 
-    result = await db.bookings.insert_one(booking_doc)
+
+async def _place_waiting(docs):
+    """
+    Positions for freshly inserted bookings. They are counted after the
+    insert, so joins racing on one trip see each other's bookings and
+    don't both report the same place. The join-time position is kept as
+    joined_position (the prediction model's input) and rescored.
+    """
+    await fill_waiting_positions(db, docs)
+    waiting = [d for d in docs if d["status"] == "waiting" and d.get("waiting_position") is not None]
+    if not waiting:
+        return
+    ops = []
+    for doc, chance in zip(waiting, _predict_bookings(waiting)):
+        doc["joined_position"] = doc["waiting_position"]
+        doc["prediction_percentage"] = float(chance)
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": {
+            "joined_position": doc["joined_position"],
+            "prediction_percentage": doc["prediction_percentage"],
+        }}))
+    await db.bookings.bulk_write(ops, ordered=False)
+
+
+@api_router.post("/bookings")
+async def create_booking(booking: BookingCreate, user: dict = Depends(get_current_user)):
+    pnr = gen_pnr()
+    travel_date = _check_booking(booking)
+    # seats come from the inventory; when it is sold out the booking waits
+    status_val, hold = await _hold_seats(booking, travel_date)
+    ticket = None
+    if status_val == "waiting":
+        ticket = await reserve_waiting_positions(db, booking.trip_id)
+    booking_doc = _booking_doc(booking, user, pnr, status_val, ticket, travel_date, hold)
+    try:
+        result = await db.bookings.insert_one(booking_doc)
+    except Exception:
+        # the seats were taken before the insert; hand them back
+        if hold:
+            await release_seats(db, hold["inventory_key"], hold["seats_held"])
+            await promotion_worker.seats_released(booking.trip_id, hold["inventory_key"])
+        raise
     booking_doc["_id"] = result.inserted_id
+    await _place_waiting([booking_doc])
+    await bump_stats(db, total_bookings=1, **{status_val: 1})
 
     # create a notification for the booking
-    await db.notifications.insert_one({
-        "user_id": user["id"],
-        "type": "booking",
-        "message": f"Booking {pnr} created ({status_val})",
-        "timestamp": datetime.utcnow().isoformat(),
-        "read": False
+    await add_notification(user["id"], "booking", f"Booking {pnr} created ({status_val})")
+
+    return doc_response(booking_doc)
+
+
+@api_router.post("/bookings/bulk")
+async def create_bookings_bulk(items: List[dict], user: dict = Depends(get_current_user)):
+    """
+    Group / agent bookings. Each item is validated on its own; PNRs and
+    waiting tickets are allocated per batch (one sequence $inc per trip)
+    and all bookings go out in one insert_many. Returns per-item results.
+    """
+    if len(items) > MAX_BULK_BOOKINGS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_BOOKINGS} bookings per request")
+
+    results = [None] * len(items)
+    valid = []  # (item index, BookingCreate)
+    for i, item in enumerate(items):
+        try:
+            valid.append((i, BookingCreate.model_validate(item)))
+        except ValidationError as exc:
+            results[i] = {"index": i, "ok": False, "error": exc.errors(include_url=False)}
+
+    dates = {}
+    for i, booking in valid:
+        try:
+            dates[i] = _check_booking(booking)
+        except HTTPException as exc:
+            results[i] = {"index": i, "ok": False, "error": exc.detail}
+    valid = [(i, booking) for i, booking in valid if i in dates]
+    holds = dict(zip(
+        (i for i, _ in valid),
+        await asyncio.gather(*[_hold_seats(booking, dates[i]) for i, booking in valid]),
+    ))
+
+    # one block of consecutive tickets per trip
+    waiting_by_trip = {}
+    for i, booking in valid:
+        if holds[i][0] == "waiting":
+            waiting_by_trip.setdefault(booking.trip_id, []).append(i)
+    starts = await asyncio.gather(*[
+        reserve_waiting_positions(db, trip_id, len(idxs)) for trip_id, idxs in waiting_by_trip.items()
+    ])
+    tickets = {}
+    for start, idxs in zip(starts, waiting_by_trip.values()):
+        tickets.update((i, start + offset) for offset, i in enumerate(idxs))
+
+    pnrs = gen_pnrs(len(valid))
+    docs = []
+    for (i, booking), pnr in zip(valid, pnrs):
+        status_val, hold = holds[i]
+        doc = _booking_doc(booking, user, pnr, status_val, tickets.get(i), dates[i], hold)
+        doc["_id"] = ObjectId()
+        docs.append((i, doc))
+
+    failed = {}
+    if docs:
+        try:
+            await db.bookings.insert_many([d for _, d in docs], ordered=False)
+        except BulkWriteError as exc:
+            for err in exc.details.get("writeErrors", []):
+                failed[err["index"]] = err.get("errmsg", "write failed")
+    await _place_waiting([doc for n, (_, doc) in enumerate(docs) if n not in failed])
+
+    deltas = {"total_bookings": 0}
+    for n, (i, doc) in enumerate(docs):
+        if n in failed:
+            # nothing to undo for a waiting ticket: an unused one shifts no position
+            if doc.get("inventory_key"):
+                await release_seats(db, doc["inventory_key"], doc["seats_held"])
+                await promotion_worker.seats_released(doc["trip_id"], doc["inventory_key"])
+            results[i] = {"index": i, "ok": False, "error": failed[n]}
+            continue
+        deltas["total_bookings"] += 1
+        deltas[doc["status"]] = deltas.get(doc["status"], 0) + 1
+        await add_notification(user["id"], "booking", f"Booking {doc['pnr']} created ({doc['status']})")
+        results[i] = {"index": i, "ok": True, "booking": prepare(doc)}
+
+    await bump_stats(db, **deltas)
+    return json_response({
+        "created": deltas["total_bookings"],
+        "failed": len(items) - deltas["total_bookings"],
+        "results": results,
     })
 
-    return serialize_mongo(booking_doc)
 
 @api_router.get("/bookings")
-async def get_my_bookings(user: dict = Depends(get_current_user)):
-    bookings = await db.bookings.find({"user_id": user["id"]}).to_list(100)
-    return [serialize_mongo(b) for b in bookings]
+async def get_my_bookings(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    user: dict = Depends(get_current_user),
+):
+    bookings, next_cursor = await paginate(
+        db.bookings, {"user_id": user["id"]}, ID_ASC, limit, cursor, PROJECTIONS["booking"]
+    )
+    await fill_waiting_positions(db, bookings)
+    return docs_response(bookings, next_cursor)
 
 
 @api_router.get("/bookings/{booking_id}")
@@ -368,52 +729,158 @@ async def get_booking(booking_id: str, user: dict = Depends(get_current_user)):
     # try as ObjectId first
     booking = None
     try:
-        booking = await db.bookings.find_one({"_id": ObjectId(booking_id), "user_id": user["id"]})
+        booking = await db.bookings.find_one(
+            {"_id": ObjectId(booking_id), "user_id": user["id"]}, PROJECTIONS["booking"]
+        )
     except Exception:
-        booking = await db.bookings.find_one({"_id": booking_id, "user_id": user["id"]})
+        booking = await db.bookings.find_one({"_id": booking_id, "user_id": user["id"]}, PROJECTIONS["booking"])
     if not booking:
         raise HTTPException(status_code=404, detail="Booking not found")
-    return serialize_mongo(booking)
+    await fill_waiting_positions(db, [booking])
+    return doc_response(booking)
 
 
 @api_router.put("/bookings/{booking_id}/cancel")
 async def cancel_booking(booking_id: str, user: dict = Depends(get_current_user)):
+    # return the previous version so the status counters can be moved
+    now = datetime.utcnow().isoformat()
     try:
         oid = ObjectId(booking_id)
-        result = await db.bookings.update_one({"_id": oid, "user_id": user["id"]}, {"$set": {"status": "cancelled"}})
+        previous = await db.bookings.find_one_and_update(
+            {"_id": oid, "user_id": user["id"]},
+            {"$set": {"status": "cancelled", "updated_at": now}},
+            return_document=ReturnDocument.BEFORE,
+        )
     except Exception:
-        result = await db.bookings.update_one({"id": booking_id, "user_id": user["id"]}, {"$set": {"status": "cancelled"}})
-    if result.matched_count == 0:
+        previous = await db.bookings.find_one_and_update(
+            {"id": booking_id, "user_id": user["id"]},
+            {"$set": {"status": "cancelled", "updated_at": now}},
+            return_document=ReturnDocument.BEFORE,
+        )
+    if previous is None:
         raise HTTPException(status_code=404, detail="Booking not found")
+    if previous.get("status") != "cancelled":
+        await bump_stats(db, cancelled=1, **{previous.get("status", "confirmed"): -1})
+        if previous.get("status") == "waiting":
+            # an outcome for the prediction model; the positions behind it
+            # move up on their own (they are ranks over tickets)
+            await db.bookings.update_one(
+                {"_id": previous["_id"]}, {"$set": {"resolved_at": now, "outcome": "cancelled"}}
+            )
+        if previous.get("status") == "confirmed" and previous.get("inventory_key"):
+            await release_seats(db, previous["inventory_key"], previous.get("seats_held", 1))
+            await promotion_worker.seats_released(previous["trip_id"], previous["inventory_key"])
     # add notification
-    await db.notifications.insert_one({
-        "user_id": user["id"],
-        "type": "cancellation",
-        "message": f"Booking {booking_id} cancelled",
-        "timestamp": datetime.utcnow().isoformat(),
-        "read": False
-    })
+    await add_notification(user["id"], "cancellation", f"Booking {booking_id} cancelled")
     return {"detail": "cancelled"}
 
 # ---------------- PREDICTION ---------------- #
 
+def _predict_items(items: List[PredictionRequest]):
+    positions = [0 if i.current_status.upper() == "RAC" else i.waiting_position for i in items]
+    return prediction_model.score(
+        [i.trip_id for i in items], [i.class_type for i in items], positions, [i.current_status for i in items]
+    )
+
+
+def _predict_bookings(bookings: List[dict]):
+    return prediction_model.score(
+        [b.get("trip_id") for b in bookings],
+        [b.get("class_type") for b in bookings],
+        [b.get("waiting_position") for b in bookings],
+        [b.get("status") for b in bookings],
+    )
+
+
 @api_router.post("/predict")
 async def predict(req: PredictionRequest, user: dict = Depends(get_current_user)):
-    status_map = {"WL": 30, "RAC": 60, "CNF": 95}
-    class_map = {"SL": 40, "3A": 70, "2A": 80, "1A": 90}
-    chance = (status_map.get(req.current_status.upper(), 50) + class_map.get(req.class_type.upper(), 50)) / 2
-    return {"confirmation_chance": int(chance)}
+    return {"confirmation_chance": int(_predict_items([req])[0])}
+
+
+@api_router.post("/predict/batch")
+async def predict_batch(req: PredictionBatchRequest, user: dict = Depends(get_current_user)):
+    """Score many requests and/or bookings in one vectorised pass."""
+    if len(req.items) + len(req.booking_ids) > MAX_BATCH_PREDICT:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_PREDICT} predictions per batch")
+
+    predictions = [{"confirmation_chance": int(c)} for c in _predict_items(req.items)] if req.items else []
+
+    scored = {}
+    if req.booking_ids:
+        ids = []
+        for booking_id in req.booking_ids:
+            try:
+                ids.append(ObjectId(booking_id))
+            except Exception:
+                continue
+        docs = await db.bookings.find(
+            {"_id": {"$in": ids}, "user_id": user["id"]},
+            {"trip_id": 1, "class_type": 1, "waiting_position": 1, "waiting_ticket": 1, "status": 1},
+        ).to_list(len(ids))
+        if docs:
+            await fill_waiting_positions(db, docs)
+            scored = {str(d["_id"]): float(c) for d, c in zip(docs, _predict_bookings(docs))}
+
+    return {"predictions": predictions, "bookings": scored}
 
 @api_router.get("/waiting-list")
 async def waiting_list(user: dict = Depends(get_current_user)):
-    docs = await db.bookings.find({"status": "waiting", "user_id": user["id"]}).to_list(200)
-    return {"bookings": [serialize_mongo(d) for d in docs]}
+    docs = await db.bookings.find(
+        {"status": "waiting", "user_id": user["id"]}, PROJECTIONS["booking"]
+    ).to_list(200)
+    # positions move as the list clears, so rescore instead of trusting the stored value
+    if docs:
+        await fill_waiting_positions(db, docs)
+        for doc, chance in zip(docs, _predict_bookings(docs)):
+            doc["prediction_percentage"] = float(chance)
+    return json_response({"bookings": [prepare(d) for d in docs]})
 
 
 @api_router.get("/notifications")
-async def get_notifications(user: dict = Depends(get_current_user)):
-    docs = await db.notifications.find({"user_id": user["id"]}).sort("timestamp", -1).to_list(200)
-    return [serialize_mongo(d) for d in docs]
+async def get_notifications(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    user: dict = Depends(get_current_user),
+):
+    docs, next_cursor = await paginate(
+        db.notifications, {"user_id": user["id"]}, NEWEST_FIRST, limit, cursor, PROJECTIONS["notification"]
+    )
+    return docs_response(docs, next_cursor)
+
+
+@api_router.get("/notifications/stream")
+async def stream_notifications(request: Request, user: dict = Depends(get_stream_user)):
+    """
+    Server-sent events: one "snapshot" event with the latest page, then a
+    "notification" event per new document, with comment heartbeats in between.
+    """
+    sub = notification_bus.subscribe(user["id"])
+
+    async def events():
+        try:
+            docs, _ = await paginate(
+                db.notifications, {"user_id": user["id"]}, NEWEST_FIRST, DEFAULT_LIMIT, None, PROJECTIONS["notification"]
+            )
+            yield b"event: snapshot\ndata: " + encode([prepare(d) for d in docs]) + b"\n\n"
+
+            while not await request.is_disconnected():
+                item = await sub.get(STREAM_HEARTBEAT)
+                if item is None:
+                    yield b": ping\n\n"
+                    continue
+                published_at, doc = item
+                event = {"id": doc.get("_id")}
+                event.update((k, doc.get(k)) for k in ("type", "message", "timestamp", "read"))
+                yield b"event: notification\ndata: " + encode(event) + b"\n\n"
+                notification_bus.record_delivery(published_at)
+        finally:
+            notification_bus.unsubscribe(sub)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 
 @api_router.put("/notifications/{notification_id}/read")
@@ -429,9 +896,15 @@ async def mark_notification_read(notification_id: str, user: dict = Depends(get_
 
 
 @api_router.get("/grievances")
-async def list_grievances(user: dict = Depends(get_current_user)):
-    docs = await db.grievances.find({"user_id": user["id"]}).to_list(200)
-    return [serialize_mongo(d) for d in docs]
+async def list_grievances(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    user: dict = Depends(get_current_user),
+):
+    docs, next_cursor = await paginate(
+        db.grievances, {"user_id": user["id"]}, ID_ASC, limit, cursor, PROJECTIONS["grievance"]
+    )
+    return docs_response(docs, next_cursor)
 
 
 @api_router.post("/grievances")
@@ -446,30 +919,100 @@ async def create_grievance(payload: GrievanceCreate, user: dict = Depends(get_cu
     }
     result = await db.grievances.insert_one(doc)
     doc["_id"] = result.inserted_id
-    return serialize_mongo(doc)
+    return doc_response(doc)
 
 
 @api_router.get("/admin/stats")
 async def admin_stats(user: dict = Depends(get_current_user)):
-    # simple stub for the dashboard
-    total_bookings = await db.bookings.count_documents({})
-    total_users = await db.users.count_documents({})
-    confirmed = await db.bookings.count_documents({"status": "confirmed"})
-    waiting = await db.bookings.count_documents({"status": "waiting"})
-    cancelled = await db.bookings.count_documents({"status": "cancelled"})
-    return {"total_bookings": total_bookings, "total_users": total_users, "confirmed": confirmed, "waiting": waiting, "cancelled": cancelled}
+    # maintained by bump_stats() in the writers, one read per refresh
+    return await read_stats(db)
+
+
+@api_router.post("/admin/stats/reconcile")
+async def admin_stats_reconcile(user: dict = Depends(get_current_user)):
+    return await reconcile_stats(db)
 
 
 @api_router.get("/admin/bookings")
-async def admin_bookings(user: dict = Depends(get_current_user)):
-    docs = await db.bookings.find().to_list(200)
-    return [serialize_mongo(d) for d in docs]
+async def admin_bookings(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    user: dict = Depends(get_current_user),
+):
+    docs, next_cursor = await paginate(db.bookings, {}, ID_ASC, limit, cursor, PROJECTIONS["booking"])
+    await fill_waiting_positions(db, docs)
+    return docs_response(docs, next_cursor)
 
 
 @api_router.get("/admin/grievances")
-async def admin_grievances(user: dict = Depends(get_current_user)):
-    docs = await db.grievances.find().to_list(200)
-    return [serialize_mongo(d) for d in docs]
+async def admin_grievances(
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    cursor: Optional[str] = None,
+    user: dict = Depends(get_current_user),
+):
+    docs, next_cursor = await paginate(db.grievances, {}, ID_ASC, limit, cursor, PROJECTIONS["grievance"])
+    return docs_response(docs, next_cursor)
+
+# ---------------- STARTUP ---------------- #
+
+@app.on_event("startup")
+async def startup():
+    global data_version_task, prediction_task
+    await ensure_indexes(db)
+    if VERIFY_QUERY_PLANS:
+        await verify_query_plans(db)
+    await ensure_stats(db)
+    await reload_search_engine()
+    await prediction_model.refresh(db)
+    notification_writer.start()
+    promotion_worker.start()
+    loop_lag.start()
+    data_version_task = asyncio.create_task(watch_data_version())
+    prediction_task = asyncio.create_task(watch_outcomes())
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    loop_lag.stop()
+    if data_version_task:
+        data_version_task.cancel()
+    if prediction_task:
+        prediction_task.cancel()
+    # promotions emit notifications, so stop them before the writer
+    await promotion_worker.stop()
+    await notification_writer.stop()
+    password_hasher.shutdown()
+
+# ---------------- METRICS ---------------- #
+
+def _component_gauges():
+    # in-process component stats exported as gauges on /metrics
+    gauges = {}
+    components = {
+        "principal_cache": principal_cache,
+        "password_hasher": password_hasher,
+        "search_cache": search_cache,
+        "notification_stream": notification_bus,
+        "notification_writer": notification_writer,
+        "prediction": prediction_model,
+        "promotion": promotion_worker,
+        "loop": loop_lag,
+        "admission": load_shedder,
+        "rate_limit": rate_limiter,
+    }
+    for prefix, component in components.items():
+        for key, value in component.stats().items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                gauges[(f"ticketmate_{prefix}_{key}", ())] = value
+    return gauges
+
+
+metrics_registry.collectors.append(_component_gauges)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
 
 # ---------------- ROOT ---------------- #
 
@@ -0,0 +1,110 @@
+import bisect
+import heapq
+import re
+
+# ---------------- STATION SUGGEST ---------------- #
+
+# Typeahead for GET /api/stations/suggest. Every station is indexed under
+# its code, its full name and each later word of the name ("delhi" finds
+# "NEW DELHI"), as one sorted list of (key, station id); a prefix query is
+# a bisect plus a short scan of the matching range. Results are ranked by
+# how many routes call at the station. Prefixes matching more than
+# SCAN_LIMIT keys ("n", "new", ...) have their top results precomputed at
+# build time, so no keystroke scans more than SCAN_LIMIT keys.
+
+SCAN_LIMIT = 128
+MAX_SUGGESTIONS = 20
+
+
+def normalize(text):
+    return " ".join(re.findall(r"[a-z0-9]+", str(text).lower()))
+
+
+class StationIndex:
+    def __init__(self, stations, route_counts):
+        """
+        stations: iterable of (code, name); route_counts: {code: routes}.
+        Codes that only appear in routes are included with an empty name.
+        """
+        names = {}
+        for code, name in stations:
+            code = str(code).strip().upper()
+            if code:
+                names[code] = str(name or "").strip()
+        for code in route_counts:
+            names.setdefault(code, "")
+
+        self.codes = sorted(names)
+        self.names = [names[c] for c in self.codes]
+        self.routes = [route_counts.get(c, 0) for c in self.codes]
+        self.by_code = {c: i for i, c in enumerate(self.codes)}
+
+        keys = set()
+        for sid, (code, name) in enumerate(zip(self.codes, self.names)):
+            keys.add((code.lower(), sid))
+            words = normalize(name).split()
+            for w in range(len(words)):
+                keys.add((" ".join(words[w:]), sid))
+        self.keys = sorted(keys)
+        self._key_text = [k for k, _ in self.keys]
+
+        self._hot = {}
+        self._index_hot_prefixes()
+
+    def _index_hot_prefixes(self):
+        # walk the sorted keys depth-first, one character at a time, while
+        # a prefix still covers more than SCAN_LIMIT keys
+        text = self._key_text
+        stack = [("", 0, len(text))]
+        while stack:
+            prefix, lo, hi = stack.pop()
+            if prefix:
+                self._hot[prefix] = self._top({sid for _, sid in self.keys[lo:hi]}, MAX_SUGGESTIONS)
+            n = len(prefix)
+            i = lo
+            while i < hi:
+                if len(text[i]) <= n:
+                    i += 1
+                    continue
+                child = prefix + text[i][n]
+                j = bisect.bisect_left(text, child + "\uffff", i, hi)
+                if j - i > SCAN_LIMIT:
+                    stack.append((child, i, j))
+                i = j
+
+    def _top(self, ids, limit):
+        return heapq.nlargest(limit, ids, key=lambda sid: (self.routes[sid], -sid))
+
+    def suggest(self, query, limit=10):
+        q = normalize(query)
+        if not q:
+            return []
+        limit = max(1, min(limit, MAX_SUGGESTIONS))
+
+        ranked = self._hot.get(q)
+        if ranked is None:
+            lo = bisect.bisect_left(self._key_text, q)
+            hi = bisect.bisect_left(self._key_text, q + "\uffff", lo)
+            ranked = self._top({sid for _, sid in self.keys[lo:hi]}, limit)
+
+        # an exact code always comes first
+        exact = self.by_code.get(q.replace(" ", "").upper())
+        if exact is not None:
+            ranked = [exact] + [sid for sid in ranked if sid != exact]
+
+        return [
+            {"code": self.codes[sid], "name": self.names[sid], "routes": self.routes[sid]}
+            for sid in ranked[:limit]
+        ]
+
+    def __len__(self):
+        return len(self.codes)
+
+
+async def build_station_index(db, route_counts):
+    stations = []
+    async for doc in db.train_stations.find({}, {"_id": 0}):
+        code = doc.get("stationCode") or doc.get("code")
+        if code:
+            stations.append((code, doc.get("stationName") or doc.get("name")))
+    return StationIndex(stations, route_counts)
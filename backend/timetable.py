@@ -0,0 +1,344 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from array import array
+from functools import lru_cache
+
+from search_engine import SearchEngine
+
+# ---------------- TIMETABLE SNAPSHOT ---------------- #
+
+# load_to_mongo.py writes the search index as one flat binary file next to
+# the data it loaded; API workers mmap it read-only instead of scanning
+# train_routes, so N workers on a host share one copy through the page
+# cache and a (re)load is a header check plus a few small dictionaries.
+#
+# Layout: a header (magic, format, byte order, data version, load id,
+# CRC32 of everything after the header) and a section table, followed by fixed-width int32 arrays, 8-byte aligned:
+#     str_off / str_blob          string pool (UTF-8), scalars stored as JSON
+#     station_sid                 station id -> code
+#     post_start/train/pos        postings, CSR by station id
+#     train_meta                  per train: number, name, price, duration
+#                                 (string ids; NUMERIC = read it from train_num)
+#     train_num                   per train: price, duration as int32 when
+#                                 they are plain integers (the usual case)
+#     stop_start/station/arr/dep  stops, CSR by train; -1 = no time
+#     seat_start/date/status/count  availability table, CSR by train
+#
+# SnapshotEngine exposes the same trains / stops / postings / by_number
+# interface as SearchEngine, built from the arrays on access, so search()
+# and connections() run unchanged on top of it. Rows of the most used
+# trains are kept decoded in a small per-process LRU (DECODED_ROWS).
+#
+# open_snapshot() checks the header, the CRC and that every section lies
+# inside the file before mapping anything, so a truncated or corrupt file
+# is treated like a missing one and the worker falls back to train_routes.
+# The load id is a random token the loader also stores in meta; matching
+# on it (not just the data version) keeps a worker from serving a file
+# left behind by a load into another database at the same version.
+
+MAGIC = b"TMTT"
+FORMAT_VERSION = 3
+NO_TIME = -1
+NUMERIC = -1
+
+SECTIONS = (
+    "str_off", "str_blob", "station_sid",
+    "post_start", "post_train", "post_pos",
+    "train_meta", "train_num",
+    "stop_start", "stop_station", "stop_arr", "stop_dep",
+    "seat_start", "seat_date", "seat_status", "seat_count",
+)
+TRAIN_FIELDS = ("number", "name", "price", "duration")
+NUMERIC_FIELDS = ("price", "duration")
+
+DECODED_ROWS = int(os.getenv("TIMETABLE_DECODED_ROWS", "4096"))
+
+_HEADER = struct.Struct("<4sIBxxxQI32sI4x")  # ..., load id, crc32
+_SECTION = struct.Struct("<QQ")  # byte offset, byte length
+_BYTE_ORDER = 1 if sys.byteorder == "little" else 2
+_INT32 = range(-2 ** 31, 2 ** 31)
+
+DEFAULT_SNAPSHOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "timetable.snap")
+
+
+def snapshot_path():
+    return os.getenv("TIMETABLE_SNAPSHOT", DEFAULT_SNAPSHOT)
+
+
+def _is_int32(value):
+    return type(value) is int and value in _INT32
+
+
+class _StringPool:
+    def __init__(self):
+        self.ids = {}
+        self.offsets = array("i", [0])
+        self.blob = bytearray()
+
+    def add(self, text):
+        sid = self.ids.get(text)
+        if sid is None:
+            sid = self.ids[text] = len(self.offsets) - 1
+            self.blob += text.encode("utf-8")
+            self.offsets.append(len(self.blob))
+        return sid
+
+
+def write_snapshot(engine, path, data_version, load_id=""):
+    """Serialise a built SearchEngine to `path` (atomically replaced)."""
+    pool = _StringPool()
+    codes = sorted(engine.postings)
+    station_id = {code: i for i, code in enumerate(codes)}
+    a = {name: array("i") for name in SECTIONS if name not in ("str_off", "str_blob")}
+
+    a["station_sid"].extend(pool.add(code) for code in codes)
+    a["post_start"].append(0)
+    for code in codes:
+        for idx, pos in engine.postings[code]:
+            a["post_train"].append(idx)
+            a["post_pos"].append(pos)
+        a["post_start"].append(len(a["post_train"]))
+
+    a["stop_start"].append(0)
+    a["seat_start"].append(0)
+    for train, stops in zip(engine.trains, engine.stops):
+        for f in TRAIN_FIELDS:
+            numeric = f in NUMERIC_FIELDS and _is_int32(train[f])
+            a["train_meta"].append(NUMERIC if numeric else pool.add(json.dumps(train[f])))
+        a["train_num"].extend(train[f] if _is_int32(train[f]) else 0 for f in NUMERIC_FIELDS)
+        for code, arr, dep in stops:
+            a["stop_station"].append(station_id[code])
+            a["stop_arr"].append(NO_TIME if arr is None else arr)
+            a["stop_dep"].append(NO_TIME if dep is None else dep)
+        a["stop_start"].append(len(a["stop_station"]))
+        for travel_date, (status, count) in train["seats"].items():
+            a["seat_date"].append(pool.add(travel_date))
+            a["seat_status"].append(pool.add(status))
+            a["seat_count"].append(count)
+        a["seat_start"].append(len(a["seat_date"]))
+
+    a["str_off"] = pool.offsets
+    a["str_blob"] = pool.blob
+    payloads = [a[name].tobytes() if isinstance(a[name], array) else bytes(a[name]) for name in SECTIONS]
+
+    table = []
+    offset = _HEADER.size + _SECTION.size * len(SECTIONS)
+    for payload in payloads:
+        offset += -offset % 8
+        table.append((offset, len(payload)))
+        offset += len(payload)
+
+    body = [b"".join(_SECTION.pack(*entry) for entry in table)]
+    end = _HEADER.size + len(body[0])
+    for (start, _), payload in zip(table, payloads):
+        body += [b"\0" * (start - end), payload]
+        end = start + len(payload)
+    crc = 0
+    for part in body:
+        crc = zlib.crc32(part, crc)
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as fh:
+        fh.write(_HEADER.pack(
+            MAGIC, FORMAT_VERSION, _BYTE_ORDER, data_version, len(SECTIONS), load_id.encode("ascii"), crc
+        ))
+        for part in body:
+            fh.write(part)
+        fh.flush()
+        os.fsync(fh.fileno())
+    # workers that mapped the old file keep reading it until they reload
+    os.replace(tmp, path)
+    return offset
+
+
+def open_snapshot(path, data_version=None, load_id=None):
+    """
+    SnapshotEngine over the file at `path`, or None if it is missing,
+    truncated, corrupt or stamped with a different data version / load id.
+    """
+    try:
+        with open(path, "rb") as fh:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    try:
+        return _map_sections(mapped, data_version, load_id)
+    except (struct.error, TypeError, ValueError, IndexError, KeyError):
+        return None
+
+
+def _map_sections(mapped, data_version, load_id):
+    size = len(mapped)
+    table_end = _HEADER.size + _SECTION.size * len(SECTIONS)
+    if size < _HEADER.size:
+        return None
+    magic, fmt, order, version, n_sections, stamp, crc = _HEADER.unpack_from(mapped, 0)
+    if (magic, fmt, order, n_sections) != (MAGIC, FORMAT_VERSION, _BYTE_ORDER, len(SECTIONS)):
+        return None
+    if data_version is not None and version != data_version:
+        return None
+    stamp = stamp.rstrip(b"\0").decode("ascii")
+    if load_id is not None and stamp != load_id:
+        return None
+    if size < table_end:
+        return None
+
+    # one sequential pass over the file; once it matches, the offsets and
+    # ids inside the sections are trusted without further bounds checks
+    view = memoryview(mapped)
+    if zlib.crc32(view[_HEADER.size:]) != crc:
+        return None
+    sections = {}
+    for i, name in enumerate(SECTIONS):
+        start, length = _SECTION.unpack_from(mapped, _HEADER.size + i * _SECTION.size)
+        if start < table_end or start + length > size:
+            return None
+        chunk = view[start:start + length]
+        sections[name] = chunk if name == "str_blob" else chunk.cast("i")
+
+    # array lengths have to agree with each other before anything indexes them
+    trains = len(sections["stop_start"]) - 1
+    if (
+        trains < 0
+        or len(sections["str_off"]) < 1
+        or len(sections["seat_start"]) != trains + 1
+        or len(sections["train_meta"]) != trains * len(TRAIN_FIELDS)
+        or len(sections["train_num"]) != trains * len(NUMERIC_FIELDS)
+        or len(sections["post_start"]) != len(sections["station_sid"]) + 1
+    ):
+        return None
+    return SnapshotEngine(mapped, version, stamp, sections)
+
+
+class _Strings:
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __getitem__(self, sid):
+        return bytes(self.blob[self.offsets[sid]:self.offsets[sid + 1]]).decode("utf-8")
+
+
+class _Postings:
+    def __init__(self, station_index, start, train, pos):
+        self.station_index = station_index
+        self.start = start
+        self.train = train
+        self.pos = pos
+
+    def get(self, code, default=None):
+        sid = self.station_index.get(code)
+        if sid is None:
+            return default
+        lo, hi = self.start[sid], self.start[sid + 1]
+        return list(zip(self.train[lo:hi].tolist(), self.pos[lo:hi].tolist())) or default
+
+    def __iter__(self):
+        return iter(self.station_index)
+
+    def __len__(self):
+        return len(self.station_index)
+
+    def __getitem__(self, code):
+        postings = self.get(code)
+        if postings is None:
+            raise KeyError(code)
+        return postings
+
+
+class _Stops:
+    def __init__(self, codes, s):
+        self.codes = codes
+        self.s = s
+        self._row = lru_cache(DECODED_ROWS)(self._decode)
+
+    def __len__(self):
+        return len(self.s["stop_start"]) - 1
+
+    def __getitem__(self, idx):
+        return self._row(idx)
+
+    def _decode(self, idx):
+        s = self.s
+        lo, hi = s["stop_start"][idx], s["stop_start"][idx + 1]
+        codes = self.codes
+        return [
+            (codes[station], None if arr == NO_TIME else arr, None if dep == NO_TIME else dep)
+            for station, arr, dep in zip(
+                s["stop_station"][lo:hi].tolist(), s["stop_arr"][lo:hi].tolist(), s["stop_dep"][lo:hi].tolist()
+            )
+        ]
+
+
+class _Trains:
+    def __init__(self, strings, s):
+        self.strings = strings
+        self.s = s
+        self._row = lru_cache(DECODED_ROWS)(self._decode)
+
+    def __len__(self):
+        return len(self.s["stop_start"]) - 1
+
+    def __getitem__(self, idx):
+        return self._row(idx)
+
+    def _decode(self, idx):
+        s, strings = self.s, self.strings
+        meta = s["train_meta"][idx * len(TRAIN_FIELDS):(idx + 1) * len(TRAIN_FIELDS)].tolist()
+        numbers = dict(zip(
+            NUMERIC_FIELDS, s["train_num"][idx * len(NUMERIC_FIELDS):(idx + 1) * len(NUMERIC_FIELDS)].tolist()
+        ))
+        train = {
+            field: numbers[field] if sid == NUMERIC else json.loads(strings[sid])
+            for field, sid in zip(TRAIN_FIELDS, meta)
+        }
+        lo, hi = s["seat_start"][idx], s["seat_start"][idx + 1]
+        train["seats"] = {
+            strings[d]: (strings[st], count)
+            for d, st, count in zip(
+                s["seat_date"][lo:hi].tolist(), s["seat_status"][lo:hi].tolist(), s["seat_count"][lo:hi].tolist()
+            )
+        }
+        return train
+
+
+class _ByNumber:
+    def __init__(self, trains, index):
+        self.trains = trains
+        self.index = index  # str(trainNumber) -> train idx
+
+    def get(self, number, default=None):
+        idx = self.index.get(str(number))
+        return default if idx is None else self.trains[idx]
+
+
+class SnapshotEngine(SearchEngine):
+    def __init__(self, mapped, version, load_id, sections):
+        # only the station / train-number lookups are per-process dicts;
+        # everything else is read from the shared mapping on access
+        self._mapped = mapped
+        self.version = version
+        self.load_id = load_id
+        strings = _Strings(sections["str_off"], sections["str_blob"])
+        codes = [strings[sid] for sid in sections["station_sid"].tolist()]
+
+        self.trains = _Trains(strings, sections)
+        self.stops = _Stops(codes, sections)
+        self.postings = _Postings(
+            {code: i for i, code in enumerate(codes)},
+            sections["post_start"], sections["post_train"], sections["post_pos"],
+        )
+        meta = sections["train_meta"]
+        self.by_number = _ByNumber(self.trains, {
+            str(json.loads(strings[meta[i * len(TRAIN_FIELDS)]])): i for i in range(len(self.trains))
+        })
+
+    def route_counts(self):
+        start = self.postings.start.tolist()
+        return {code: start[i + 1] - start[i] for code, i in self.postings.station_index.items()}
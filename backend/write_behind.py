@@ -0,0 +1,146 @@
+import asyncio
+import logging
+import time
+
+from pymongo.errors import BulkWriteError, ConnectionFailure
+
+logger = logging.getLogger(__name__)
+
+# ---------------- WRITE-BEHIND ---------------- #
+
+# Buffers documents for one collection and flushes them with
+# insert_many(ordered=False) once batch_size documents are queued or
+# flush_interval seconds have passed. put() waits when the buffer is
+# full (backpressure); stop() drains whatever is left.
+#
+# A batch that fails for a transient reason (connection lost, primary
+# stepping down, server timeout) is retried with exponential backoff,
+# only the documents that did not make it, up to max_retries times
+# before they are counted as failed. The flusher waits while it backs
+# off, so a long outage fills the buffer and put() pushes back.
+
+_STOP = object()
+
+# write error codes that say "try again", not "this document is bad"
+RETRYABLE_CODES = frozenset({
+    6, 7, 50, 89, 91, 189, 262, 9001,  # host unreachable/not found, time limit, network, shutdown, stepdown
+    10107, 11600, 11602, 13435, 13436,  # not primary, interrupted
+})
+DUPLICATE_KEY = 11000
+
+
+class WriteBehindQueue:
+    def __init__(self, collection, batch_size=500, flush_interval=0.05, max_pending=10000,
+                 max_retries=5, retry_backoff=0.05):
+        self.collection = collection
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff  # seconds, doubled per attempt
+        self._queue = asyncio.Queue(maxsize=max_pending)
+        self._task = None
+
+        self.enqueued = 0
+        self.written = 0
+        self.failed = 0
+        self.retried = 0
+        self.batches = 0
+        self.lag_last = 0.0  # seconds from put() to insert_many returning
+        self.lag_max = 0.0
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def put(self, doc):
+        await self._queue.put((time.perf_counter(), doc))
+        self.enqueued += 1
+
+    async def stop(self):
+        if self._task is None:
+            return
+        # the sentinel queues up behind every pending document, so the
+        # flusher drains them all before it exits
+        await self._queue.put((time.perf_counter(), _STOP))
+        await self._task
+        self._task = None
+
+    async def _run(self):
+        stopping = False
+        while not stopping:
+            batch = [await self._queue.get()]
+            deadline = time.perf_counter() + self.flush_interval
+            while len(batch) < self.batch_size and batch[-1][1] is not _STOP:
+                if self._queue.empty():
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch.append(self._queue.get_nowait())
+
+            if batch[-1][1] is _STOP:
+                batch.pop()
+                stopping = True
+            await self._flush(batch)
+
+    async def _flush(self, batch):
+        if not batch:
+            return
+        docs = [doc for _, doc in batch]
+        for attempt in range(self.max_retries + 1):
+            docs = await self._insert(docs, attempt)
+            if not docs:
+                break
+            if attempt == self.max_retries:
+                self.failed += len(docs)
+                logger.error("write-behind flush to %s: gave up on %d documents", self.collection.name, len(docs))
+                break
+            self.retried += len(docs)
+            await asyncio.sleep(self.retry_backoff * 2 ** attempt)
+        self.batches += 1
+        self.lag_last = time.perf_counter() - batch[0][0]
+        if self.lag_last > self.lag_max:
+            self.lag_max = self.lag_last
+
+    async def _insert(self, docs, attempt):
+        """One insert_many; returns the documents worth another attempt."""
+        try:
+            await self.collection.insert_many(docs, ordered=False)
+            self.written += len(docs)
+            return []
+        except BulkWriteError as exc:
+            # ordered=False: everything but the failing documents was written
+            errors = exc.details.get("writeErrors", [])
+            retry = [docs[e["index"]] for e in errors if e.get("code") in RETRYABLE_CODES]
+            # insert_many set _id on every document, so on a retry a duplicate
+            # key means an earlier attempt did write it
+            written_before = sum(1 for e in errors if attempt and e.get("code") == DUPLICATE_KEY)
+            self.written += exc.details.get("nInserted", 0) + written_before
+            failed = len(errors) - len(retry) - written_before
+            if failed:
+                self.failed += failed
+                logger.error("write-behind flush to %s: %d documents failed", self.collection.name, failed)
+            return retry
+        except ConnectionFailure:
+            logger.warning("write-behind flush to %s: connection failure, retrying", self.collection.name, exc_info=True)
+            return docs
+        except Exception:
+            self.failed += len(docs)
+            logger.exception("write-behind flush to %s failed", self.collection.name)
+            return []
+
+    def stats(self):
+        return {
+            "pending": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "written": self.written,
+            "failed": self.failed,
+            "retried": self.retried,
+            "batches": self.batches,
+            "lag_last_ms": self.lag_last * 1000,
+            "lag_max_ms": self.lag_max * 1000,
+        }
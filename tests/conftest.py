@@ -0,0 +1,5 @@
+import os
+import sys
+
+# backend modules are flat and imported by name (as server.py does)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend"))
@@ -0,0 +1,22 @@
+import asyncio
+
+
+class Yielding:
+    """Database proxy that yields to the loop around every awaited call, so
+    concurrent callers interleave the way they do against a real server."""
+
+    def __init__(self, target):
+        self._target = target
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if asyncio.iscoroutinefunction(attr):
+            async def call(*args, **kwargs):
+                await asyncio.sleep(0)
+                result = await attr(*args, **kwargs)
+                await asyncio.sleep(0)
+                return result
+            return call
+        if name.startswith("_") or callable(attr):
+            return attr
+        return Yielding(attr)
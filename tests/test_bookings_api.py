@@ -0,0 +1,135 @@
+import asyncio
+
+import httpx
+from mongomock_motor import AsyncMongoMockClient
+
+import server
+from hashing import PasswordHasher
+
+PASSENGER = {"name": "A", "age": 30, "gender": "F"}
+ROUTE = {
+    "trainNumber": "100", "trainName": "Test Exp", "totalFare": 500, "duration": 300,
+    "stops": [{"code": "AAA", "arr": None, "dep": 600, "day": 1}, {"code": "BBB", "arr": 900, "dep": None, "day": 1}],
+    "availability": [{"date": "2026-01-01", "status": "AVAILABLE", "count": 2}],
+}
+
+
+# the app's queues bind to the first loop that uses them, so every test shares one
+LOOP = asyncio.new_event_loop()
+
+
+def run_app(scenario):
+    """Run `scenario(client, headers, db)` against the app on a fresh mock database."""
+    async def main():
+        server.client = AsyncMongoMockClient()
+        server.db = db = server.client["bookings_api"]
+        server.notification_writer.collection = db.notifications
+        server.promotion_worker.db = db
+        server.rate_limiter.rate = 0
+        # shutdown closes the hashing pool, so every run gets its own
+        server.password_hasher = PasswordHasher(server.pwd_context, 2)
+        await db.train_routes.insert_one(dict(ROUTE))
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            for handler in server.app.router.on_startup:
+                await handler()
+            try:
+                r = await c.post("/api/auth/signup", json={"name": "T", "email": "t@example.com", "password": "pw"})
+                headers = {"Authorization": "Bearer " + r.json()["access_token"]}
+                return await scenario(c, headers, db)
+            finally:
+                for handler in server.app.router.on_shutdown:
+                    await handler()
+
+    return LOOP.run_until_complete(main())
+
+
+def booking(**extra):
+    body = {"trip_id": "100", "trip_type": "train", "passengers": [PASSENGER],
+            "booking_type": "waiting", "travel_date": "2026-01-01", "class_type": "SL"}
+    body.update(extra)
+    return body
+
+
+def test_concurrent_waiting_joins_get_distinct_positions():
+    async def scenario(c, headers, db):
+        rs = await asyncio.gather(*[c.post("/api/bookings", json=booking(), headers=headers) for _ in range(30)])
+        docs = await db.bookings.find({"status": "waiting"}).to_list(None)
+        return [r.json() for r in rs], docs
+
+    created, docs = run_app(scenario)
+    assert sum(b["status"] == "confirmed" for b in created) == 2
+    waiting = [b for b in created if b["status"] == "waiting"]
+    assert sorted(b["waiting_position"] for b in waiting) == list(range(1, 29))
+    assert all("waiting_ticket" not in b for b in created)
+    # the join-time position is what the prediction model learns from
+    assert sorted(d["joined_position"] for d in docs) == list(range(1, 29))
+
+
+def test_bulk_join_positions_follow_request_order():
+    async def scenario(c, headers, db):
+        await c.post("/api/bookings", json=booking(), headers=headers)
+        await c.post("/api/bookings", json=booking(), headers=headers)
+        r = await c.post("/api/bookings/bulk", json=[booking(), booking(), booking()], headers=headers)
+        return r.json()
+
+    result = run_app(scenario)
+    assert [x["booking"]["waiting_position"] for x in result["results"]] == [1, 2, 3]
+
+
+def test_failed_insert_gives_the_seats_back(monkeypatch):
+    async def scenario(c, headers, db):
+        collection = type(db.bookings)
+        insert_one = collection.insert_one
+
+        async def failing(self, doc, *args, **kwargs):
+            if self.name == "bookings":
+                raise RuntimeError("primary stepped down")
+            return await insert_one(self, doc, *args, **kwargs)
+
+        monkeypatch.setattr(collection, "insert_one", failing)
+        try:
+            await c.post("/api/bookings", json=booking(), headers=headers)
+        except RuntimeError:
+            pass
+        monkeypatch.setattr(collection, "insert_one", insert_one)
+        inventory = await db.seat_inventory.find_one({"_id": "100|2026-01-01|SL"})
+        ok = await c.post("/api/bookings", json=booking(), headers=headers)
+        return inventory, ok.json()
+
+    inventory, created = run_app(scenario)
+    assert inventory["seats"] == inventory["capacity"] == 2
+    assert created["status"] == "confirmed"
+
+
+def test_search_reports_seats_left_in_the_live_inventory():
+    async def scenario(c, headers, db):
+        query = {"origin": "AAA", "destination": "BBB", "date": "2026-01-01", "transport_type": "train"}
+        before = await c.post("/api/search", json=query, headers=headers)  # cached from here on
+        await c.post("/api/bookings", json=booking(), headers=headers)
+        after = await c.post("/api/search", json=query, headers=headers)
+        batch = await c.post("/api/search/batch", json=[query, dict(query, class_type="3A")], headers=headers)
+        return before.json(), after.json(), batch.json()
+
+    before, after, batch = run_app(scenario)
+    seats = [r["seats_available"] for r in (before["results"][0], after["results"][0])]
+    assert seats == [2, 1]
+    assert [b["results"][0]["seats_available"] for b in batch["results"]] == [1, 2]
+
+
+def test_bookings_list_pages_follow_the_next_cursor():
+    async def scenario(c, headers, db):
+        created = [(await c.post("/api/bookings", json=booking(), headers=headers)).json()["id"] for _ in range(7)]
+        seen, params = [], {"limit": 3}
+        while True:
+            r = await c.get("/api/bookings", params=params, headers=headers)
+            seen += [b["id"] for b in r.json()]
+            if "X-Next-Cursor" not in r.headers:
+                break
+            params = {"limit": 3, "cursor": r.headers["X-Next-Cursor"]}
+        bad = await c.get("/api/bookings", params={"cursor": "garbage"}, headers=headers)
+        return created, seen, bad.status_code
+
+    created, seen, bad = run_app(scenario)
+    assert seen == created
+    assert bad == 400
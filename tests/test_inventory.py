@@ -0,0 +1,92 @@
+import asyncio
+import random
+
+import pytest
+from mongomock_motor import AsyncMongoMockClient
+from pymongo.errors import DuplicateKeyError
+
+from inventory import inventory_key, release, reserve
+from tests.interleave import Yielding
+
+KEY = inventory_key("12001", "2026-01-01", "SL")
+CAPACITY = 10
+
+
+async def book_and_maybe_cancel(db, rng, held):
+    seats = rng.randint(1, 3)
+    if not await reserve(db, KEY, seats, CAPACITY):
+        return
+    held.append(seats)
+    await asyncio.sleep(0)
+    if rng.random() < 0.4:
+        held.remove(seats)
+        await release(db, KEY, seats)
+
+
+async def watch(db, lows, done):
+    while not done.is_set():
+        doc = await db.seat_inventory.find_one({"_id": KEY})
+        if doc is not None:
+            lows.append(doc["seats"])
+        await asyncio.sleep(0)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_concurrent_reserve_and_release_never_oversell(seed):
+    async def scenario():
+        db = Yielding(AsyncMongoMockClient()["inventory"])
+        rng = random.Random(seed)
+        held, lows, done = [], [], asyncio.Event()
+        watcher = asyncio.create_task(watch(db, lows, done))
+        await asyncio.gather(*[book_and_maybe_cancel(db, rng, held) for _ in range(80)])
+        done.set()
+        await watcher
+        return await db.seat_inventory.find_one({"_id": KEY}), held, lows
+
+    doc, held, lows = asyncio.run(scenario())
+    assert min(lows) >= 0
+    assert sum(held) <= CAPACITY
+    assert doc["seats"] == CAPACITY - sum(held)
+    assert doc["capacity"] == CAPACITY
+
+
+def test_first_bookings_racing_to_create_the_document():
+    # every booking finds no document and upserts; only one seeding counts
+    async def scenario():
+        db = Yielding(AsyncMongoMockClient()["inventory"])
+        return await asyncio.gather(*[reserve(db, KEY, 1, CAPACITY) for _ in range(25)]), \
+            await db.seat_inventory.find_one({"_id": KEY})
+
+    results, doc = asyncio.run(scenario())
+    assert results.count(True) == CAPACITY
+    assert doc["seats"] == 0 and doc["capacity"] == CAPACITY
+
+
+class DuplicateUpserts:
+    """seat_inventory whose upserts fail like a real server's losing upsert
+    does when another booking inserted the same _id first."""
+
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    async def update_one(self, query, update, upsert=False):
+        if upsert and await self._collection.find_one({"_id": query["_id"]}) is not None:
+            raise DuplicateKeyError("E11000 duplicate key error")
+        return await self._collection.update_one(query, update, upsert=upsert)
+
+
+def test_losing_upsert_still_takes_seats():
+    async def scenario():
+        mock = AsyncMongoMockClient()["inventory"]
+        db = Yielding(mock)
+        # check and upsert run back to back, as one step on the server
+        db.__dict__["seat_inventory"] = Yielding(DuplicateUpserts(mock.seat_inventory))
+        results = await asyncio.gather(*[reserve(db, KEY, 2, CAPACITY) for _ in range(8)])
+        return results, await mock.seat_inventory.find_one({"_id": KEY})
+
+    results, doc = asyncio.run(scenario())
+    assert results.count(True) == CAPACITY // 2
+    assert doc["seats"] == 0
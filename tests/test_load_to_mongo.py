@@ -0,0 +1,104 @@
+import io
+
+import pandas as pd
+import pytest
+
+from data_loader.load_to_mongo import normalize_route, parse_status, parse_stops, to_minutes, to_number
+
+
+@pytest.mark.parametrize("raw, expected", [
+    (12001, 12001),
+    (12001.0, 12001),
+    ("12001", 12001),
+    (99.5, 99.5),
+    ("", ""),
+    ("5h 10m", "5h 10m"),
+    (float("nan"), None),
+])
+def test_to_number(raw, expected):
+    value = to_number(raw)
+    if expected is None:
+        assert value != value  # NaN passed through untouched
+    else:
+        assert value == expected and type(value) is type(expected)
+
+
+def test_numeric_columns_agree_across_chunks():
+    # the second chunk has a blank fare and number, which makes pandas read
+    # those columns as float there but as int in the first chunk
+    csv = io.StringIO(
+        "trainNumber,trainName,totalFare,duration,stationListParsed,availability\n"
+        "12001,A,450,300,,\n"
+        "12002,B,,310,,\n"
+        ",C,99.5,320,,\n"
+    )
+    docs = []
+    for chunk in pd.read_csv(csv, chunksize=1):
+        docs += [normalize_route(d) for d in chunk.fillna("").to_dict(orient="records")]
+    assert [d["trainNumber"] for d in docs] == [12001, 12002, ""]
+    assert [type(d["totalFare"]) for d in docs] == [int, str, float]
+    assert all(type(d["duration"]) is int for d in docs)
+
+
+# ---------------- PARSE ---------------- #
+
+@pytest.mark.parametrize("raw, minutes", [
+    ("00:00", 0),
+    ("06:05", 365),
+    ("23:59", 1439),
+    (" 7:30 ", 450),
+    ("10:15:00", 615),
+    ("--", None),
+    ("Source", None),
+    ("Destination", None),
+    ("", None),
+    (None, None),
+    ("ab:cd", None),
+])
+def test_to_minutes(raw, minutes):
+    assert to_minutes(raw) == minutes
+
+
+@pytest.mark.parametrize("raw, parsed", [
+    ("AVAILABLE-0008", ("AVAILABLE", 8)),
+    ("available-0120", ("AVAILABLE", 120)),
+    ("AVAILABLE", ("AVAILABLE", 0)),
+    ("RAC12", ("RAC", 12)),
+    ("RAC 3", ("RAC", 3)),
+    ("GNWL34/WL20", ("WL", 20)),
+    ("PQWL5", ("WL", 5)),
+    ("WL7", ("WL", 7)),
+    ("REGRET", ("REGRET", 0)),
+    ("NOT AVAILABLE", ("NOT AVAILABLE", 0)),
+    ("", ("UNKNOWN", 0)),
+    (None, ("UNKNOWN", 0)),
+])
+def test_parse_status(raw, parsed):
+    assert parse_status(raw) == parsed
+
+
+def test_parse_stops():
+    raw = repr([
+        {"stationCode": "ndls", "arrivalTime": "--", "departureTime": "06:00", "dayCount": "1"},
+        {"stationCode": "AGC", "arrivalTime": "08:55", "departureTime": "09:00", "dayCount": 1},
+        {"stationName": "no code, skipped"},
+        {"stationCode": " BPL ", "arrivalTime": "00:40", "departureTime": "00:50", "dayCount": "2"},
+        {"stationCode": "NGP", "arrivalTime": "07:10", "departureTime": "Destination", "dayCount": ""},
+        "not a stop",
+    ])
+    assert parse_stops(raw) == [
+        {"code": "NDLS", "seq": 0, "arr": None, "dep": 360, "day": 1},
+        {"code": "AGC", "seq": 1, "arr": 535, "dep": 540, "day": 1},
+        {"code": "BPL", "seq": 2, "arr": 40, "dep": 50, "day": 2},
+        {"code": "NGP", "seq": 3, "arr": 430, "dep": None, "day": 1},  # blank day count -> day 1
+    ]
+
+
+@pytest.mark.parametrize("raw", ["", None, "[", "{'a': 1}", "not python"])
+def test_parse_stops_bad_input(raw):
+    assert parse_stops(raw) == []
+
+
+def test_bad_day_count_defaults_to_day_one():
+    raw = repr([{"stationCode": "AGC", "arrivalTime": "08:55", "departureTime": "09:00", "dayCount": "two"}])
+    assert parse_stops(raw)[0]["day"] == 1
@@ -0,0 +1,27 @@
+from types import SimpleNamespace
+
+from bson.int64 import Int64
+
+from metrics import MongoCommandTimer, Registry
+
+
+def run_command(timer, request_id, name, command):
+    event = SimpleNamespace(connection_id=("db", 27017), request_id=request_id,
+                            command_name=name, command=command, duration_micros=1500)
+    timer.started(event)
+    timer.succeeded(event)
+
+
+def test_commands_are_labelled_with_their_collection():
+    registry = Registry()
+    timer = MongoCommandTimer(registry)
+    run_command(timer, 1, "find", {"find": "bookings", "filter": {}})
+    run_command(timer, 2, "getMore", {"getMore": Int64(81234567), "collection": "bookings"})
+    run_command(timer, 3, "ping", {"ping": 1})
+
+    labels = {labels for name, labels in registry.histograms}
+    assert labels == {
+        (("collection", "bookings"), ("op", "find")),
+        (("collection", "bookings"), ("op", "getMore")),
+        (("collection", ""), ("op", "ping")),
+    }
@@ -0,0 +1,73 @@
+import asyncio
+
+from notify_bus import NotificationBus
+
+SUBSCRIBERS = 10000
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_publish_only_touches_that_users_subscriptions():
+    bus = NotificationBus(buffer_size=10)
+    subs = [bus.subscribe(f"user-{i}") for i in range(SUBSCRIBERS)]
+    extra = bus.subscribe("user-42")  # a second tab for the same user
+    assert bus.connections == SUBSCRIBERS + 1
+
+    bus.publish("user-42", {"message": "hello"})
+
+    for sub in subs + [extra]:
+        if sub.user_id == "user-42":
+            assert [doc for _, doc in sub.pending] == [{"message": "hello"}]
+        else:
+            assert not sub.pending
+    assert bus.published == 1 and bus.dropped == 0
+
+
+def test_publish_to_user_without_subscribers_is_a_noop():
+    bus = NotificationBus()
+    bus.subscribe("someone")
+    bus.publish("nobody", {"message": "lost"})
+    assert bus.published == 1
+    assert bus.stats()["users"] == 1
+
+
+def test_idle_subscribers_time_out_with_none():
+    async def scenario():
+        bus = NotificationBus()
+        subs = [bus.subscribe(f"user-{i}") for i in range(SUBSCRIBERS)]
+        return await asyncio.gather(*[sub.get(timeout=0.05) for sub in subs])
+
+    results = run(scenario())
+    assert results == [None] * SUBSCRIBERS
+
+
+def test_parked_subscriber_wakes_on_publish():
+    async def scenario():
+        bus = NotificationBus()
+        idle = [bus.subscribe(f"user-{i}") for i in range(SUBSCRIBERS)]
+        sub = bus.subscribe("target")
+        waiting = asyncio.create_task(sub.get(timeout=5))
+        await asyncio.sleep(0)
+        bus.publish("target", {"message": "hi"})
+        _, doc = await waiting
+        return doc, [s.waiter for s in idle]
+
+    doc, waiters = run(scenario())
+    assert doc == {"message": "hi"}
+    assert waiters == [None] * SUBSCRIBERS
+
+
+def test_unsubscribe_restores_connections():
+    bus = NotificationBus()
+    subs = [bus.subscribe(f"user-{i % 1000}") for i in range(SUBSCRIBERS)]
+    assert bus.connections == SUBSCRIBERS
+    assert bus.stats()["users"] == 1000
+
+    for sub in subs:
+        bus.unsubscribe(sub)
+    bus.unsubscribe(subs[0])  # twice is harmless
+
+    assert bus.connections == 0
+    assert bus.stats()["users"] == 0
@@ -0,0 +1,69 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+from mongomock_motor import AsyncMongoMockClient
+
+from pagination import ID_ASC, NEWEST_FIRST, decode_cursor, encode_cursor, paginate
+
+
+async def walk(collection, query, sort, limit):
+    pages, cursor = [], None
+    while True:
+        docs, cursor = await paginate(collection, query, sort, limit, cursor)
+        pages.append(docs)
+        if cursor is None:
+            return pages
+
+
+def test_walks_every_booking_once_in_id_order():
+    async def scenario():
+        db = AsyncMongoMockClient()["pagination"]
+        await db.bookings.insert_many([{"_id": ObjectId(), "user_id": "u" if n % 3 else "other"} for n in range(40)])
+        mine = [d["_id"] for d in await db.bookings.find({"user_id": "u"}).to_list(None)]
+        return mine, await walk(db.bookings, {"user_id": "u"}, ID_ASC, 5)
+
+    mine, pages = asyncio.run(scenario())
+    seen = [d["_id"] for page in pages for d in page]
+    assert seen == sorted(mine) and len(set(seen)) == len(mine) == 26
+    assert [len(p) for p in pages] == [5, 5, 5, 5, 5, 1]
+
+
+def test_walks_notifications_newest_first_across_equal_timestamps():
+    async def scenario():
+        db = AsyncMongoMockClient()["pagination"]
+        # four notifications share each timestamp, so page edges fall inside ties
+        docs = [{"_id": ObjectId(), "user_id": "u", "timestamp": f"2026-01-01T00:00:{n // 4:02d}"} for n in range(22)]
+        await db.notifications.insert_many(docs)
+        return docs, await walk(db.notifications, {"user_id": "u"}, NEWEST_FIRST, 3)
+
+    docs, pages = asyncio.run(scenario())
+    seen = [(d["timestamp"], d["_id"]) for page in pages for d in page]
+    assert seen == sorted(((d["timestamp"], d["_id"]) for d in docs), reverse=True)
+    assert len(set(seen)) == 22
+
+
+def test_exact_multiple_of_the_limit_ends_without_an_empty_page():
+    async def scenario():
+        db = AsyncMongoMockClient()["pagination"]
+        await db.bookings.insert_many([{"user_id": "u"} for _ in range(6)])
+        return await walk(db.bookings, {"user_id": "u"}, ID_ASC, 3)
+
+    assert [len(p) for p in asyncio.run(scenario())] == [3, 3]
+
+
+def test_cursor_round_trip():
+    doc = {"_id": ObjectId(), "timestamp": "2026-01-01T00:00:00"}
+    assert decode_cursor(encode_cursor(doc, NEWEST_FIRST), NEWEST_FIRST) == [doc["timestamp"], doc["_id"]]
+
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    encode_cursor({"_id": ObjectId(), "timestamp": "t"}, NEWEST_FIRST),  # wrong sort
+    "WyJub3QgYW4gb2JqZWN0IGlkIl0=",  # ["not an object id"]
+])
+def test_bad_cursor_is_a_400(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor, ID_ASC)
+    assert exc.value.status_code == 400
@@ -0,0 +1,91 @@
+import asyncio
+
+from bson import ObjectId
+from mongomock_motor import AsyncMongoMockClient
+
+from prediction import PredictionModel
+
+
+def resolved(status, outcome, at, **extra):
+    doc = {"_id": ObjectId(), "trip_id": "12001", "class_type": "SL", "joined_position": 3,
+           "status": status, "resolved_at": at}
+    if outcome is not None:
+        doc["outcome"] = outcome
+    doc.update(extra)
+    return doc
+
+
+def test_outcome_is_used_over_current_status():
+    model = PredictionModel()
+    # promoted, then cancelled by the passenger: still a confirmation
+    model.add_outcomes([resolved("cancelled", "confirmed", "t1")] * 20)
+    promoted = model.score_one("12001", "SL", 3)
+
+    other = PredictionModel()
+    other.add_outcomes([resolved("cancelled", "cancelled", "t1")] * 20)
+    assert promoted > other.score_one("12001", "SL", 3)
+
+
+def test_refresh_reads_outcome_and_advances_watermark():
+    async def scenario():
+        db = AsyncMongoMockClient()["prediction"]
+        await db.bookings.insert_many([
+            resolved("cancelled", "confirmed", "2026-01-01T00:00:01"),
+            resolved("cancelled", "cancelled", "2026-01-01T00:00:02"),
+            resolved("confirmed", None, "2026-01-01T00:00:03"),  # resolved before outcome existed
+            {"_id": ObjectId(), "trip_id": "12001", "status": "waiting", "resolved_at": None},
+        ])
+        model = PredictionModel()
+        first = await model.refresh(db)
+        again = await model.refresh(db)
+        return model, first, again
+
+    model, first, again = asyncio.run(scenario())
+    assert (first, again) == (3, 0)
+    assert model.confirmed.sum() == 2 and model.total.sum() == 3
+
+
+def test_refresh_picks_up_outcomes_written_late():
+    # worker A's outcome lands after worker B's newer one was already read
+    async def scenario():
+        db = AsyncMongoMockClient()["prediction"]
+        model = PredictionModel()
+        await db.bookings.insert_one(resolved("confirmed", "confirmed", "2026-01-01T00:00:30"))
+        first = await model.refresh(db)
+        await db.bookings.insert_one(resolved("cancelled", "cancelled", "2026-01-01T00:00:20"))
+        late = await model.refresh(db)
+        again = await model.refresh(db)
+        return model, first, late, again
+
+    model, first, late, again = asyncio.run(scenario())
+    assert (first, late, again) == (1, 1, 0)
+    assert model.total.sum() == 2 and model.confirmed.sum() == 1
+    assert model.watermark == "2026-01-01T00:00:30"
+
+
+def test_refresh_pages_through_ties_without_double_counting():
+    async def scenario():
+        db = AsyncMongoMockClient()["prediction"]
+        await db.bookings.insert_many([resolved("confirmed", "confirmed", "2026-01-01T00:00:01") for _ in range(7)])
+        model = PredictionModel()
+        first = await model.refresh(db, batch=3)
+        again = await model.refresh(db, batch=3)
+        return model, first, again
+
+    model, first, again = asyncio.run(scenario())
+    assert (first, again) == (7, 0) and model.total.sum() == 7
+
+
+def test_outcomes_older_than_the_overlap_are_forgotten():
+    async def scenario():
+        db = AsyncMongoMockClient()["prediction"]
+        model = PredictionModel()
+        await db.bookings.insert_many([
+            resolved("confirmed", "confirmed", "2026-01-01T00:00:00"),
+            resolved("confirmed", "confirmed", "2026-01-01T00:05:00"),
+        ])
+        await model.refresh(db)
+        return model
+
+    model = asyncio.run(scenario())
+    assert list(model.recent.values()) == ["2026-01-01T00:05:00"]
@@ -0,0 +1,126 @@
+import pytest
+
+from search_engine import MAX_LAYOVER, MIN_LAYOVER, SearchEngine
+
+
+def route(number, *stops):
+    """stops: (code, arr, dep) in minutes since midnight, optionally with a day count."""
+    return {
+        "trainNumber": number,
+        "trainName": f"Train {number}",
+        "totalFare": 100,
+        "duration": 60,
+        "stops": [{"code": s[0], "arr": s[1], "dep": s[2], "day": s[3] if len(s) > 3 else 1} for s in stops],
+        "availability": [],
+    }
+
+
+def engine_with(*routes):
+    engine = SearchEngine()
+    for r in routes:
+        engine.add_route(r)
+    return engine
+
+
+def numbers(matches):
+    return [train["number"] for train, _dep, _arr in matches]
+
+
+# ---------------- DIRECT ---------------- #
+
+def test_origin_after_destination_is_rejected():
+    engine = engine_with(route(1, ("AAA", None, 600), ("BBB", 700, 705), ("CCC", 800, None)))
+    assert numbers(engine.search("AAA", "CCC")) == [1]
+    assert engine.search("CCC", "AAA") == []
+    assert engine.search("AAA", "AAA") == []
+
+
+def test_intermediate_stop_origin_uses_its_departure():
+    engine = engine_with(route(1, ("AAA", None, 600), ("BBB", 700, 705), ("CCC", 800, None)))
+    [(train, dep, arr)] = engine.search("BBB", "CCC")
+    assert (train["number"], dep, arr) == (1, "11:45", "13:20")
+
+
+def test_times_past_midnight_use_the_day_count():
+    engine = engine_with(route(1, ("AAA", None, 1380), ("BBB", 60, None, 2)))
+    assert engine.search("AAA", "BBB")[0][1:] == ("23:00", "01:00")
+
+
+def test_loop_train_keeps_the_first_visit_only():
+    # AAA -> BBB -> AAA -> CCC: only the first AAA is indexed
+    engine = engine_with(route(1, ("AAA", None, 600), ("BBB", 700, 705), ("AAA", 800, 805), ("CCC", 900, None)))
+    [(_train, dep, arr)] = engine.search("AAA", "CCC")
+    assert (dep, arr) == ("10:00", "15:00")
+    assert engine.search("BBB", "AAA") == []
+
+
+def test_unknown_station():
+    engine = engine_with(route(1, ("AAA", None, 600), ("BBB", 700, None)))
+    assert engine.search("AAA", "ZZZ") == []
+    assert engine.connections("ZZZ", "BBB") == []
+
+
+# ---------------- CONNECTIONS ---------------- #
+
+def feeder(arrive_via):
+    return route(1, ("AAA", None, 480), ("VIA", arrive_via, arrive_via + 5))
+
+
+def onward(number, depart_via, arrive=None):
+    return route(number, ("VIA", None, depart_via), ("BBB", arrive if arrive is not None else depart_via + 60, None))
+
+
+@pytest.mark.parametrize("layover, found", [
+    (MIN_LAYOVER - 1, False),
+    (MIN_LAYOVER, True),
+    (MAX_LAYOVER, True),
+    (MAX_LAYOVER + 1, False),
+])
+def test_layover_bounds(layover, found):
+    arrive_via = 600
+    engine = engine_with(feeder(arrive_via), onward(2, (arrive_via + layover) % 1440))
+    itineraries = engine.connections("AAA", "BBB")
+    assert bool(itineraries) is found
+    if found:
+        assert itineraries[0]["layover"] == layover
+
+
+def test_layover_wraps_past_midnight():
+    # arrive 23:30, next train leaves 00:30 (the next day)
+    engine = engine_with(feeder(1410), onward(2, 30, 90))
+    [itinerary] = engine.connections("AAA", "BBB")
+    assert itinerary["layover"] == 60
+    assert itinerary["duration"] == (1410 - 480) + 60 + 60
+    first, second = itinerary["legs"]
+    assert first[1:] == ("AAA", "VIA", "08:00", "23:30")
+    assert second[1:] == ("VIA", "BBB", "00:30", "01:30")
+
+
+def test_same_train_is_not_a_connection():
+    engine = engine_with(route(1, ("AAA", None, 480), ("VIA", 600, 660), ("BBB", 720, None)))
+    assert numbers(engine.search("AAA", "BBB")) == [1]
+    assert engine.connections("AAA", "BBB") == []
+
+
+def test_connections_are_ranked_by_total_time():
+    engine = engine_with(
+        feeder(600),
+        onward(2, 900, 1000),  # 3h wait
+        onward(3, 660, 800),   # 1h wait, slow train
+        onward(4, 700, 720),   # fastest overall
+    )
+    itineraries = engine.connections("AAA", "BBB")
+    assert [c["legs"][1][0]["number"] for c in itineraries] == [4, 3, 2]
+    assert [c["duration"] for c in itineraries] == [240, 320, 520]
+    assert len(engine.connections("AAA", "BBB", limit=2)) == 2
+
+
+def test_one_itinerary_per_train_pair():
+    # the trains meet at two stations; only one transfer between them is returned
+    engine = engine_with(
+        route(1, ("AAA", None, 480), ("VIA", 600, 605), ("ALT", 700, 705)),
+        route(2, ("VIA", None, 640), ("ALT", 740, 745), ("BBB", 800, None)),
+    )
+    [itinerary] = engine.connections("AAA", "BBB")
+    assert itinerary["legs"][0][2] in ("VIA", "ALT")
+    assert itinerary["duration"] == 800 - 480
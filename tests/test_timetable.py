@@ -0,0 +1,96 @@
+import struct
+
+import pytest
+
+from search_engine import SearchEngine
+from timetable import _HEADER, _SECTION, SECTIONS, open_snapshot, write_snapshot
+
+
+def route(number, fare, duration, codes):
+    return {
+        "trainNumber": number,
+        "trainName": f"Train {number}",
+        "totalFare": fare,
+        "duration": duration,
+        "stops": [{"code": c, "arr": 600 + 60 * i, "dep": 605 + 60 * i} for i, c in enumerate(codes)],
+        "availability": [{"date": "2026-01-01", "status": "AVAILABLE", "count": 12}],
+    }
+
+
+@pytest.fixture
+def engine():
+    engine = SearchEngine()
+    engine.add_route(route("12001", 450, 300, ["NDLS", "AGC", "BPL"]))
+    engine.add_route(route("12002", 99.5, "5h 10m", ["AGC", "BPL"]))  # not int32: kept as JSON
+    engine.add_route(route(12003, 2 ** 40, None, ["NDLS", "BPL"]))
+    return engine
+
+
+@pytest.fixture
+def snapshot(tmp_path, engine):
+    path = str(tmp_path / "timetable.snap")
+    write_snapshot(engine, path, data_version=7, load_id="a" * 32)
+    return path
+
+
+def test_round_trip_matches_the_heap_engine(engine, snapshot):
+    mapped = open_snapshot(snapshot, data_version=7, load_id="a" * 32)
+    assert mapped is not None and mapped.version == 7 and mapped.load_id == "a" * 32
+    assert [mapped.trains[i] for i in range(len(mapped))] == list(engine.trains)
+    assert mapped.search("NDLS", "BPL") == engine.search("NDLS", "BPL")
+    assert mapped.by_number.get("12002")["price"] == 99.5
+
+
+def test_other_data_version_is_rejected(snapshot):
+    assert open_snapshot(snapshot, data_version=8) is None
+
+
+def test_other_load_id_is_rejected(snapshot):
+    # same data version, written by a load into another database
+    assert open_snapshot(snapshot, data_version=7, load_id="b" * 32) is None
+    assert open_snapshot(snapshot, data_version=7, load_id="") is None
+
+
+def test_missing_or_empty_file(tmp_path):
+    assert open_snapshot(str(tmp_path / "nope.snap")) is None
+    (tmp_path / "empty.snap").write_bytes(b"")
+    assert open_snapshot(str(tmp_path / "empty.snap")) is None
+
+
+@pytest.mark.parametrize("keep", [5, _HEADER.size, _HEADER.size + _SECTION.size * 3, -1, -100])
+def test_truncated_file_is_rejected(tmp_path, snapshot, keep):
+    data = open(snapshot, "rb").read()
+    path = tmp_path / "cut.snap"
+    path.write_bytes(data[:keep])
+    assert open_snapshot(str(path)) is None
+
+
+def test_section_outside_the_file_is_rejected(tmp_path, snapshot):
+    data = bytearray(open(snapshot, "rb").read())
+    entry = _HEADER.size + SECTIONS.index("stop_start") * _SECTION.size
+    start, _ = _SECTION.unpack_from(data, entry)
+    struct.pack_into("<QQ", data, entry, start, len(data))
+    path = tmp_path / "bad.snap"
+    path.write_bytes(bytes(data))
+    assert open_snapshot(str(path)) is None
+
+
+def test_inconsistent_sections_are_rejected(tmp_path, snapshot):
+    data = bytearray(open(snapshot, "rb").read())
+    entry = _HEADER.size + SECTIONS.index("train_meta") * _SECTION.size
+    start, length = _SECTION.unpack_from(data, entry)
+    struct.pack_into("<QQ", data, entry, start, length - 4)
+    path = tmp_path / "short.snap"
+    path.write_bytes(bytes(data))
+    assert open_snapshot(str(path)) is None
+
+
+@pytest.mark.parametrize("section", ["stop_station", "post_train", "str_blob"])
+def test_corrupt_section_contents_are_rejected(tmp_path, snapshot, section):
+    # lengths still agree; only the CRC notices an out-of-range id
+    data = bytearray(open(snapshot, "rb").read())
+    start, _ = _SECTION.unpack_from(data, _HEADER.size + SECTIONS.index(section) * _SECTION.size)
+    struct.pack_into("<i", data, start, 10 ** 6)
+    path = tmp_path / "flipped.snap"
+    path.write_bytes(bytes(data))
+    assert open_snapshot(str(path)) is None
@@ -0,0 +1,79 @@
+import asyncio
+import random
+
+from mongomock_motor import AsyncMongoMockClient
+
+from counters import fill_waiting_positions, reserve_waiting_positions
+from tests.interleave import Yielding
+
+
+async def join(db, trip_id, user):
+    # what create_booking does: ticket, insert, then the position
+    ticket = await reserve_waiting_positions(db, trip_id)
+    doc = {"trip_id": trip_id, "user_id": user, "status": "waiting", "waiting_ticket": ticket}
+    await db.bookings.insert_one(doc)
+    await fill_waiting_positions(db, [doc])
+    return doc["waiting_position"]
+
+
+async def leave(db, trip_id, rng):
+    # a promotion or a cancellation: status flips, nothing is renumbered
+    docs = await db.bookings.find({"trip_id": trip_id, "status": "waiting"}).to_list(None)
+    if docs:
+        doc = rng.choice(docs)
+        await db.bookings.update_one({"_id": doc["_id"]}, {"$set": {"status": rng.choice(["confirmed", "cancelled"])}})
+
+
+async def positions(db, trip_id):
+    docs = await db.bookings.find({"trip_id": trip_id}, {"trip_id": 1, "status": 1, "waiting_ticket": 1}).to_list(None)
+    await fill_waiting_positions(db, docs)
+    waiting = sorted((d["waiting_position"], str(d["_id"])) for d in docs if d["status"] == "waiting")
+    return [p for p, _ in waiting], docs
+
+
+def test_concurrent_joins_report_distinct_positions():
+    async def scenario():
+        db = Yielding(AsyncMongoMockClient()["positions_join"])
+        return await asyncio.gather(*[join(db, "T1", f"u{i}") for i in range(300)])
+
+    assert sorted(asyncio.run(scenario())) == list(range(1, 301))
+
+
+def test_positions_stay_contiguous_while_joins_and_departures_interleave():
+    async def scenario():
+        db = AsyncMongoMockClient()["positions"]
+        rng = random.Random(5)
+        ops = [join(db, "T1", f"u{i}") for i in range(500)] + [leave(db, "T1", rng) for _ in range(150)]
+        rng.shuffle(ops)
+        await asyncio.gather(*ops)
+        return await positions(db, "T1")
+
+    waiting, docs = asyncio.run(scenario())
+    assert waiting == list(range(1, len(waiting) + 1))
+    assert all("waiting_ticket" not in d for d in docs)
+    assert all(d["waiting_position"] is None for d in docs if d["status"] != "waiting")
+
+
+def test_position_follows_ticket_order_across_trips():
+    async def scenario():
+        db = AsyncMongoMockClient()["positions_trips"]
+        for trip_id in ("A", "B"):
+            for i in range(5):
+                await join(db, trip_id, f"{trip_id}{i}")
+        await db.bookings.update_one({"trip_id": "A", "waiting_ticket": 2}, {"$set": {"status": "confirmed"}})
+        docs = await db.bookings.find({}, {"trip_id": 1, "status": 1, "waiting_ticket": 1, "user_id": 1}).to_list(None)
+        await fill_waiting_positions(db, docs)
+        return {d["user_id"]: d["waiting_position"] for d in docs}
+
+    by_user = asyncio.run(scenario())
+    assert [by_user[f"A{i}"] for i in range(5)] == [1, None, 2, 3, 4]
+    assert [by_user[f"B{i}"] for i in range(5)] == [1, 2, 3, 4, 5]
+
+
+def test_bookings_without_a_ticket_keep_their_stored_position():
+    async def scenario():
+        doc = {"trip_id": "A", "status": "waiting", "waiting_position": 7}
+        await fill_waiting_positions(AsyncMongoMockClient()["legacy"], [doc])
+        return doc
+
+    assert asyncio.run(scenario())["waiting_position"] == 7
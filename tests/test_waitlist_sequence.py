@@ -0,0 +1,42 @@
+import asyncio
+
+from mongomock_motor import AsyncMongoMockClient
+
+from counters import reserve_waiting_positions
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_parallel_single_reservations_are_unique_and_contiguous():
+    async def scenario():
+        db = AsyncMongoMockClient()["waitlist_single"]
+        return await asyncio.gather(*[reserve_waiting_positions(db, "12345") for _ in range(5000)])
+
+    positions = run(scenario())
+    assert sorted(positions) == list(range(1, 5001))
+
+
+def test_parallel_block_reservations_do_not_overlap():
+    async def scenario():
+        db = AsyncMongoMockClient()["waitlist_block"]
+        sizes = [1 + i % 7 for i in range(1000)]
+        starts = await asyncio.gather(*[reserve_waiting_positions(db, "12345", n) for n in sizes])
+        return sizes, starts
+
+    sizes, starts = run(scenario())
+    positions = [start + offset for start, n in zip(starts, sizes) for offset in range(n)]
+    assert sorted(positions) == list(range(1, sum(sizes) + 1))
+
+
+def test_trips_have_independent_sequences():
+    async def scenario():
+        db = AsyncMongoMockClient()["waitlist_trips"]
+        trips = ["A", "B", "C"] * 500
+        firsts = await asyncio.gather(*[reserve_waiting_positions(db, t) for t in trips])
+        return trips, firsts
+
+    trips, firsts = run(scenario())
+    for trip in ("A", "B", "C"):
+        assert sorted(p for t, p in zip(trips, firsts) if t == trip) == list(range(1, 501))
@@ -0,0 +1,73 @@
+import asyncio
+
+from pymongo.errors import AutoReconnect, BulkWriteError
+
+from write_behind import WriteBehindQueue
+
+
+class FlakyCollection:
+    """insert_many that fails according to a script, then stores everything."""
+
+    name = "flaky"
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.stored = []
+        self.calls = 0
+
+    async def insert_many(self, docs, ordered=False):
+        self.calls += 1
+        for doc in docs:
+            doc.setdefault("_id", id(doc))
+        step = self.script.pop(0) if self.script else None
+        if step is None:
+            self.stored += docs
+            return
+        if step == "down":
+            raise AutoReconnect("primary stepped down")
+        code, bad = step  # fail the documents at these indexes with `code`
+        errors = [{"index": i, "code": code} for i in bad]
+        self.stored += [d for i, d in enumerate(docs) if i not in bad]
+        raise BulkWriteError({"writeErrors": errors, "nInserted": len(docs) - len(bad)})
+
+
+def flush(collection, n=10, **kwargs):
+    async def scenario():
+        writer = WriteBehindQueue(collection, retry_backoff=0, **kwargs)
+        writer.start()
+        for i in range(n):
+            await writer.put({"n": i})
+        await writer.stop()
+        return writer
+
+    return asyncio.run(scenario())
+
+
+def test_retryable_write_errors_are_retried():
+    collection = FlakyCollection([(189, [1, 4]), (91, [0])])
+    writer = flush(collection)
+    assert sorted(d["n"] for d in collection.stored) == list(range(10))
+    assert (writer.written, writer.failed, writer.retried) == (10, 0, 3)
+    assert collection.calls == 3
+
+
+def test_connection_failure_retries_the_whole_batch():
+    collection = FlakyCollection(["down", "down"])
+    writer = flush(collection)
+    assert sorted(d["n"] for d in collection.stored) == list(range(10))
+    assert (writer.written, writer.failed) == (10, 0)
+
+
+def test_permanent_errors_are_not_retried():
+    collection = FlakyCollection([(121, [2, 3])])  # document failed validation
+    writer = flush(collection)
+    assert (writer.written, writer.failed) == (8, 2)
+    assert collection.calls == 1
+
+
+def test_gives_up_after_max_retries():
+    collection = FlakyCollection(["down"] * 10)
+    writer = flush(collection, max_retries=2)
+    assert collection.stored == []
+    assert (writer.written, writer.failed) == (0, 10)
+    assert collection.calls == 3